@@ -0,0 +1,53 @@
+"""Add habits per user indexes
+
+Revision ID: 0c5e2f7b91d4
+Revises: b7d13e5a9c20
+Create Date: 2026-10-17 10:41:07.129884
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5e2f7b91d4'
+down_revision: Union[str, Sequence[str], None] = 'b7d13e5a9c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_habits_user_id_id',
+            'habits',
+            ['user_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_habits_user_id_name',
+            'habits',
+            ['user_id', 'name'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_habits_user_id_name',
+            table_name='habits',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_habits_user_id_id',
+            table_name='habits',
+            postgresql_concurrently=True,
+        )
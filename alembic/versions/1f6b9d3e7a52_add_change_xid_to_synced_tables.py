@@ -0,0 +1,92 @@
+"""Add change_xid to synced tables
+
+Revision ID: 1f6b9d3e7a52
+Revises: d4b8f2a61e39
+Create Date: 2026-10-17 20:41:09.583120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f6b9d3e7a52'
+down_revision: Union[str, Sequence[str], None] = 'd4b8f2a61e39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = 'pg_current_xact_id()::text::bigint'
+
+# (table, index scope, index replaced)
+SYNCED_TABLES = (
+    ('habits', 'user_id', 'ix_habits_user_id_change_seq'),
+    ('habits_conclusion', 'habit_id', 'ix_habits_conclusion_change_seq'),
+    (
+        'habit_tombstones',
+        'user_id',
+        'ix_habit_tombstones_user_id_change_seq',
+    ),
+)
+
+
+def _index_name(table: str, scope: str) -> str:
+    return f'ix_{table}_{scope}_change_xid_change_seq'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, _, _ in SYNCED_TABLES:
+        # Existing rows were all committed long ago, so a constant 0 keeps
+        # the column add free of a table rewrite.
+        op.add_column(
+            table,
+            sa.Column(
+                'change_xid',
+                sa.BigInteger(),
+                server_default='0',
+                nullable=False,
+            ),
+        )
+        op.alter_column(
+            table, 'change_xid', server_default=sa.text(CURRENT_XID)
+        )
+
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for table, scope, old_index in SYNCED_TABLES:
+            op.create_index(
+                _index_name(table, scope),
+                table,
+                [scope, 'change_xid', 'change_seq'],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                old_index, table_name=table, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table, scope, old_index in SYNCED_TABLES:
+            columns = ['change_seq']
+            if scope == 'user_id':
+                columns = ['user_id', 'change_seq']
+            op.create_index(
+                old_index,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                _index_name(table, scope),
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+
+    for table, _, _ in SYNCED_TABLES:
+        op.drop_column(table, 'change_xid')
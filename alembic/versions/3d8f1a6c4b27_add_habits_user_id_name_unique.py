@@ -0,0 +1,72 @@
+"""Add habits user_id name unique constraint
+
+Revision ID: 3d8f1a6c4b27
+Revises: 9a41c6d8e2f3
+Create Date: 2026-10-17 14:02:18.331907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8f1a6c4b27'
+down_revision: Union[str, Sequence[str], None] = '9a41c6d8e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Names that raced past the old pre-check keep the oldest row as-is and
+    # get the habit id appended on the others.
+    op.execute(
+        sa.text(
+            """
+            UPDATE habits h
+            SET name = h.name || ' (' || h.id || ')'
+            FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, name ORDER BY id
+                ) AS rn
+                FROM habits
+            ) d
+            WHERE h.id = d.id AND d.rn > 1
+            """
+        )
+    )
+
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_habits_user_id_name',
+            'habits',
+            ['user_id', 'name'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        'ALTER TABLE habits ADD CONSTRAINT uq_habits_user_id_name '
+        'UNIQUE USING INDEX uq_habits_user_id_name'
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_habits_user_id_name',
+            table_name='habits',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_habits_user_id_name',
+            'habits',
+            ['user_id', 'name'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint('uq_habits_user_id_name', 'habits', type_='unique')
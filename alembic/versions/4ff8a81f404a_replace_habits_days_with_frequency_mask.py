@@ -0,0 +1,70 @@
+"""Replace habits_days with frequency mask
+
+Revision ID: 4ff8a81f404a
+Revises: 58bb49fbac12
+Create Date: 2026-10-17 09:12:44.310512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ff8a81f404a'
+down_revision: Union[str, Sequence[str], None] = '58bb49fbac12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'habits',
+        sa.Column(
+            'frequency_mask',
+            sa.SmallInteger(),
+            server_default='0',
+            nullable=False,
+        ),
+    )
+
+    # Bit (day_id - 1) is set for every weekday linked in habits_days
+    op.execute(
+        """
+        UPDATE habits
+        SET frequency_mask = days.mask
+        FROM (
+            SELECT habit_id, bit_or(1 << (day_id - 1)) AS mask
+            FROM habits_days
+            GROUP BY habit_id
+        ) AS days
+        WHERE habits.id = days.habit_id
+        """
+    )
+
+    op.alter_column('habits', 'frequency_mask', server_default=None)
+    op.drop_table('habits_days')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('habits_days',
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('day_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['day_id'], ['days.id'], ),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+    sa.PrimaryKeyConstraint('habit_id', 'day_id')
+    )
+
+    op.execute(
+        """
+        INSERT INTO habits_days (habit_id, day_id)
+        SELECT habits.id, days.id
+        FROM habits
+        JOIN days ON habits.frequency_mask & (1 << (days.id - 1)) <> 0
+        """
+    )
+
+    op.drop_column('habits', 'frequency_mask')
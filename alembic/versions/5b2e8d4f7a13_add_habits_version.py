@@ -0,0 +1,33 @@
+"""Add habits version
+
+Revision ID: 5b2e8d4f7a13
+Revises: e41b7c9d0a58
+Create Date: 2026-10-17 15:21:40.683219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8d4f7a13'
+down_revision: Union[str, Sequence[str], None] = 'e41b7c9d0a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'habits',
+        sa.Column(
+            'version', sa.Integer(), server_default='1', nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('habits', 'version')
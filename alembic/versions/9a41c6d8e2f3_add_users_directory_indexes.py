@@ -0,0 +1,68 @@
+"""Add users directory indexes
+
+Revision ID: 9a41c6d8e2f3
+Revises: 0c5e2f7b91d4
+Create Date: 2026-10-17 11:26:52.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a41c6d8e2f3'
+down_revision: Union[str, Sequence[str], None] = '0c5e2f7b91d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_lower_pattern',
+            'users',
+            [sa.text('lower(email) text_pattern_ops')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_username_lower_pattern',
+            'users',
+            [sa.text('lower(username) text_pattern_ops')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_id_admin',
+            'users',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text('is_admin'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_id_inactive',
+            'users',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text('NOT is_active'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name in (
+            'ix_users_id_inactive',
+            'ix_users_id_admin',
+            'ix_users_username_lower_pattern',
+            'ix_users_email_lower_pattern',
+        ):
+            op.drop_index(
+                index_name, table_name='users', postgresql_concurrently=True
+            )
@@ -0,0 +1,97 @@
+"""Add habits streak counters
+
+Revision ID: a7c3e5f90b14
+Revises: f2d9a4b6c831
+Create Date: 2026-10-17 18:04:51.227340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e5f90b14'
+down_revision: Union[str, Sequence[str], None] = 'f2d9a4b6c831'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in ('current_streak', 'longest_streak', 'total_completions'):
+        op.add_column(
+            'habits',
+            sa.Column(column, sa.Integer(), server_default='0', nullable=False),
+        )
+    op.add_column(
+        'habits', sa.Column('last_completed_at', sa.Date(), nullable=True)
+    )
+
+    # Same computation as StreakService.rebuild: a conclusion starts a new
+    # run when a scheduled weekday was skipped since the previous one.
+    op.execute(
+        """
+        WITH ordered AS (
+            SELECT habit_id,
+                   conclusion_date AS day,
+                   lag(conclusion_date) OVER (
+                       PARTITION BY habit_id ORDER BY conclusion_date
+                   ) AS previous
+            FROM habits_conclusion
+        ), breaks AS (
+            SELECT o.habit_id,
+                   o.day,
+                   CASE
+                       WHEN o.previous IS NULL THEN 1
+                       WHEN o.day - o.previous - 1 <= 0 THEN 0
+                       WHEN o.day - o.previous - 1 >= 7 THEN
+                           (h.frequency_mask <> 0)::int
+                       ELSE ((
+                           ((((1 << (o.day - o.previous - 1)) - 1)
+                             << ((extract(dow FROM o.previous)::int + 1) % 7))
+                            | ((((1 << (o.day - o.previous - 1)) - 1)
+                             << ((extract(dow FROM o.previous)::int + 1) % 7))
+                               >> 7))
+                           & 127 & h.frequency_mask) <> 0)::int
+                   END AS starts_run
+            FROM ordered o
+            JOIN habits h ON h.id = o.habit_id
+        ), numbered AS (
+            SELECT habit_id,
+                   day,
+                   sum(starts_run) OVER (
+                       PARTITION BY habit_id ORDER BY day
+                   ) AS run
+            FROM breaks
+        ), runs AS (
+            SELECT habit_id, count(*) AS length, max(day) AS last_day
+            FROM numbered
+            GROUP BY habit_id, run
+        ), totals AS (
+            SELECT habit_id,
+                   (array_agg(length ORDER BY last_day DESC))[1] AS current,
+                   max(length) AS longest,
+                   sum(length) AS total,
+                   max(last_day) AS last_day
+            FROM runs
+            GROUP BY habit_id
+        )
+        UPDATE habits
+        SET current_streak = totals.current,
+            longest_streak = totals.longest,
+            total_completions = totals.total,
+            last_completed_at = totals.last_day
+        FROM totals
+        WHERE habits.id = totals.habit_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('habits', 'last_completed_at')
+    op.drop_column('habits', 'total_completions')
+    op.drop_column('habits', 'longest_streak')
+    op.drop_column('habits', 'current_streak')
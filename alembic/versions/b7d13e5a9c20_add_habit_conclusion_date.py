@@ -0,0 +1,58 @@
+"""Add habit conclusion date
+
+Revision ID: b7d13e5a9c20
+Revises: 4ff8a81f404a
+Create Date: 2026-10-17 10:03:18.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d13e5a9c20'
+down_revision: Union[str, Sequence[str], None] = '4ff8a81f404a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'habits_conclusion',
+        sa.Column('conclusion_date', sa.Date(), nullable=True),
+    )
+    op.execute(
+        'UPDATE habits_conclusion SET conclusion_date = created_at::date'
+    )
+
+    # Keep the first conclusion of each day before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM habits_conclusion
+        WHERE id NOT IN (
+            SELECT min(id)
+            FROM habits_conclusion
+            GROUP BY habit_id, conclusion_date
+        )
+        """
+    )
+
+    op.alter_column('habits_conclusion', 'conclusion_date', nullable=False)
+    op.create_unique_constraint(
+        'uq_habits_conclusion_habit_id_conclusion_date',
+        'habits_conclusion',
+        ['habit_id', 'conclusion_date'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'uq_habits_conclusion_habit_id_conclusion_date',
+        'habits_conclusion',
+        type_='unique',
+    )
+    op.drop_column('habits_conclusion', 'conclusion_date')
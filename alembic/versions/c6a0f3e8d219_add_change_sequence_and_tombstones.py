@@ -0,0 +1,132 @@
+"""Add change sequence and habit tombstones
+
+Revision ID: c6a0f3e8d219
+Revises: 5b2e8d4f7a13
+Create Date: 2026-10-17 16:05:12.948371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a0f3e8d219'
+down_revision: Union[str, Sequence[str], None] = '5b2e8d4f7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 10000
+
+# (table, index, columns)
+SEQUENCED_INDEXES = (
+    ('habits', 'ix_habits_user_id_change_seq', ['user_id', 'change_seq']),
+    ('habits_conclusion', 'ix_habits_conclusion_change_seq', ['change_seq']),
+)
+
+
+def _add_change_seq(table: str) -> None:
+    # A volatile default on ADD COLUMN would rewrite the whole table under
+    # an ACCESS EXCLUSIVE lock. The column starts empty instead; the default
+    # only applies to new rows, and existing ones are numbered in batches.
+    op.add_column(table, sa.Column('change_seq', sa.BigInteger()))
+    op.alter_column(
+        table, 'change_seq', server_default=sa.text("nextval('change_seq')")
+    )
+
+    # Each batch commits on its own, so no lock outlives a batch
+    with op.get_context().autocommit_block():
+        while True:
+            result = op.get_bind().execute(
+                sa.text(
+                    f"""
+                    UPDATE {table}
+                    SET change_seq = nextval('change_seq')
+                    WHERE id IN (
+                        SELECT id FROM {table}
+                        WHERE change_seq IS NULL
+                        LIMIT :batch_size
+                    )
+                    """
+                ),
+                {'batch_size': BACKFILL_BATCH_SIZE},
+            )
+            if not result.rowcount:
+                break
+
+    # SET NOT NULL reuses a validated CHECK instead of scanning the table
+    # while holding its lock; VALIDATE itself doesn't block writes.
+    op.execute(
+        f'ALTER TABLE {table} ADD CONSTRAINT {table}_change_seq_not_null '
+        'CHECK (change_seq IS NOT NULL) NOT VALID'
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            f'ALTER TABLE {table} '
+            f'VALIDATE CONSTRAINT {table}_change_seq_not_null'
+        )
+    op.alter_column(table, 'change_seq', nullable=False)
+    op.drop_constraint(f'{table}_change_seq_not_null', table, type_='check')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('change_seq')))
+
+    for table, _, _ in SEQUENCED_INDEXES:
+        _add_change_seq(table)
+
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for table, index, columns in SEQUENCED_INDEXES:
+            op.create_index(
+                index,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+    op.create_table(
+        'habit_tombstones',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'change_seq',
+            sa.BigInteger(),
+            server_default=sa.text("nextval('change_seq')"),
+            nullable=False,
+        ),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['users.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_habit_tombstones_user_id_change_seq',
+        'habit_tombstones',
+        ['user_id', 'change_seq'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_habit_tombstones_user_id_change_seq',
+        table_name='habit_tombstones',
+    )
+    op.drop_table('habit_tombstones')
+    with op.get_context().autocommit_block():
+        for table, index, _ in SEQUENCED_INDEXES:
+            op.drop_index(
+                index, table_name=table, postgresql_concurrently=True
+            )
+    op.drop_column('habits_conclusion', 'change_seq')
+    op.drop_column('habits', 'change_seq')
+    op.execute(sa.schema.DropSequence(sa.Sequence('change_seq')))
@@ -0,0 +1,53 @@
+"""Create habit history table
+
+Revision ID: d4b8f2a61e39
+Revises: a7c3e5f90b14
+Create Date: 2026-10-17 19:26:08.914552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8f2a61e39'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e5f90b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'habit_history',
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.SmallInteger(), nullable=False),
+        sa.Column('bits', postgresql.BIT(length=366), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['habit_id'], ['habits.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('habit_id', 'year'),
+    )
+
+    op.execute(
+        """
+        INSERT INTO habit_history (habit_id, year, bits)
+        SELECT habit_id,
+               extract(year FROM conclusion_date)::int,
+               bit_or(set_bit(
+                   B'0'::bit(366),
+                   extract(doy FROM conclusion_date)::int - 1,
+                   1
+               ))
+        FROM habits_conclusion
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('habit_history')
@@ -0,0 +1,46 @@
+"""Cascade habit conclusions on delete
+
+Revision ID: e41b7c9d0a58
+Revises: 3d8f1a6c4b27
+Create Date: 2026-10-17 14:48:05.127643
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7c9d0a58'
+down_revision: Union[str, Sequence[str], None] = '3d8f1a6c4b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace_fk(on_delete: str) -> None:
+    # NOT VALID keeps the swap itself to a brief lock. The existing rows
+    # are checked in a transaction of their own: run in the migration's
+    # transaction, VALIDATE would hold the swap's ACCESS EXCLUSIVE locks
+    # for the whole scan.
+    op.execute(
+        'ALTER TABLE habits_conclusion '
+        'DROP CONSTRAINT habits_conclusion_habit_id_fkey, '
+        'ADD CONSTRAINT habits_conclusion_habit_id_fkey '
+        'FOREIGN KEY (habit_id) REFERENCES habits (id) '
+        f'{on_delete} NOT VALID'
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            'ALTER TABLE habits_conclusion '
+            'VALIDATE CONSTRAINT habits_conclusion_habit_id_fkey'
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_fk('ON DELETE CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_fk('')
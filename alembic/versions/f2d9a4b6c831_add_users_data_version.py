@@ -0,0 +1,33 @@
+"""Add users data version
+
+Revision ID: f2d9a4b6c831
+Revises: c6a0f3e8d219
+Create Date: 2026-10-17 17:12:33.509126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d9a4b6c831'
+down_revision: Union[str, Sequence[str], None] = 'c6a0f3e8d219'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'data_version', sa.BigInteger(), server_default='1', nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
@@ -9,6 +9,14 @@ class APIException(Exception):
         self.message = message
 
 
+class NotModifiedException(APIException):
+    def __init__(self, etag: str):
+        super().__init__(
+            status_code=status.HTTP_304_NOT_MODIFIED, message='Not modified'
+        )
+        self.etag = etag
+
+
 class NotFoundException(APIException):
     def __init__(self, item: str):
         super().__init__(
@@ -38,3 +46,15 @@ class ForbiddenException(APIException):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN, message=message
         )
+
+
+class ConflictException(APIException):
+    def __init__(self, message: str = 'Conflict'):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, message=message)
+
+
+class ServiceUnavailableException(APIException):
+    def __init__(self, message: str = 'Service unavailable, try again later.'):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, message=message
+        )
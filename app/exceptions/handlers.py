@@ -1,10 +1,10 @@
 from http import HTTPStatus
 
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
-from app.exceptions.api_exception import APIException
+from app.exceptions.api_exception import APIException, NotModifiedException
 from app.schemas.response import BaseResponse
 
 
@@ -17,6 +17,10 @@ async def api_exception_handler(request: Request, exc: APIException):
     )
 
 
+async def not_modified_handler(request: Request, exc: NotModifiedException):
+    return Response(status_code=exc.status_code, headers={'ETag': exc.etag})
+
+
 async def validation_exception_handler(
     request: Request, exc: RequestValidationError
 ):
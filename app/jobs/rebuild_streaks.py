@@ -0,0 +1,18 @@
+import asyncio
+import logging
+
+from app.services.streak_service import StreakService
+from app.utils.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    async with SessionLocal() as db:
+        rebuilt = await StreakService.rebuild_all(db)
+    logger.info('Rewrote drifted streak counters on %d habits', rebuilt)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,24 +1,42 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
-from app.exceptions.api_exception import APIException
+from app.exceptions.api_exception import APIException, NotModifiedException
 from app.exceptions.handlers import (
     api_exception_handler,
+    not_modified_handler,
     validation_exception_handler,
 )
 from app.exceptions.middleware import GlobalExceptionMiddleware
+from app.utils.database import SessionLocal
+from app.utils.security import password_hasher
+from app.utils.week_days import check_week_days
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with SessionLocal() as db:
+        await check_week_days(db)
+    yield
+    password_hasher.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_exception_handler(APIException, api_exception_handler)
+app.add_exception_handler(NotModifiedException, not_modified_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_middleware(GlobalExceptionMiddleware)
 
 
 from app.routers.auth_routes import authRouter  # noqa: E402
+from app.routers.dashboard_routes import dashboard_router  # noqa: E402
 from app.routers.habit_routes import habit_router  # noqa: E402
 from app.routers.user_routes import user_router  # noqa: E402
 
 app.include_router(user_router)
 app.include_router(authRouter)
 app.include_router(habit_router)
+app.include_router(dashboard_router)
@@ -1,7 +1,15 @@
 from app.models.day import Day
 from app.models.habit import Habit
 from app.models.habit_conclution import HabitConclusion
-from app.models.habit_day import habits_days
+from app.models.habit_history import HabitHistory
+from app.models.habit_tombstone import HabitTombstone
 from app.models.user import User
 
-__all__ = ['User', 'Habit', 'Day', 'habits_days', 'HabitConclusion']
+__all__ = [
+    'User',
+    'Habit',
+    'Day',
+    'HabitConclusion',
+    'HabitHistory',
+    'HabitTombstone',
+]
@@ -0,0 +1,14 @@
+from sqlalchemy import Sequence, text
+
+from app.utils.database import Base
+
+# Shared by every synced table so /habit/changes can order rows coming
+# from all of them with a single cursor.
+change_sequence = Sequence('change_seq', metadata=Base.metadata)
+
+# change_seq is drawn at write time, not at commit, so it alone can't tell
+# whether an earlier value is still to become visible. Synced rows also
+# keep the id of the transaction that wrote them: every transaction below
+# a snapshot's xmin has finished, so those rows are safe to hand out.
+current_xid = text('pg_current_xact_id()::text::bigint')
+snapshot_xmin = text('pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
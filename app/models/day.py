@@ -1,9 +1,8 @@
 from datetime import datetime
 
 from sqlalchemy import func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column
 
-from app.models.habit_day import habits_days
 from app.utils.database import Base
 
 
@@ -15,9 +14,6 @@ class Day(Base):
     )
     name: Mapped[str] = mapped_column(nullable=False, unique=True)
     is_active: Mapped[bool] = mapped_column(default=True)
-    habits: Mapped[list['Habit']] = relationship(  # noqa: F821
-        secondary=habits_days, back_populates='frequency', lazy='selectin'
-    )
     updated_at: Mapped[datetime] = mapped_column(default=func.now())
     created_at: Mapped[datetime] = mapped_column(default=func.now())
 
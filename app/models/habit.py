@@ -1,14 +1,32 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
-from sqlalchemy import ForeignKey, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
 
-from app.models.habit_day import habits_days
+from app.models.change_sequence import change_sequence, current_xid
 from app.utils.database import Base
 
 
 class Habit(Base):
     __tablename__ = 'habits'
+    __table_args__ = (
+        Index('ix_habits_user_id_id', 'user_id', 'id'),
+        Index(
+            'ix_habits_user_id_change_xid_change_seq',
+            'user_id',
+            'change_xid',
+            'change_seq',
+        ),
+        UniqueConstraint('user_id', 'name', name='uq_habits_user_id_name'),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, index=True, autoincrement=True
@@ -16,15 +34,33 @@ class Habit(Base):
     name: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str] = mapped_column()
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
-    frequency: Mapped[list['Day']] = relationship(  # noqa: F821
-        secondary=habits_days, back_populates='habits', lazy='selectin'
-    )
+    frequency_mask: Mapped[int] = mapped_column(SmallInteger, default=0)
     is_active: Mapped[bool] = mapped_column(default=True)
-    updated_at: Mapped[datetime] = mapped_column(default=func.now())
+    version: Mapped[int] = mapped_column(default=1, server_default='1')
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        change_sequence,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+    )
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=current_xid, onupdate=current_xid
+    )
+    # Streak counters, kept in step with habits_conclusion by the writes
+    # that mark and unmark the habit.
+    current_streak: Mapped[int] = mapped_column(default=0, server_default='0')
+    longest_streak: Mapped[int] = mapped_column(default=0, server_default='0')
+    total_completions: Mapped[int] = mapped_column(
+        default=0, server_default='0'
+    )
+    last_completed_at: Mapped[Optional[date]] = mapped_column()
+    updated_at: Mapped[datetime] = mapped_column(
+        default=func.now(), onupdate=func.now()
+    )
     created_at: Mapped[datetime] = mapped_column(default=func.now())
 
-    def __init__(self, name, description, user_id, frequency):
+    def __init__(self, name, description, user_id, frequency_mask):
         self.name = name
         self.description = description
         self.user_id = user_id
-        self.frequency = frequency
+        self.frequency_mask = frequency_mask
@@ -1,18 +1,43 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import BigInteger, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.models.change_sequence import change_sequence, current_xid
 from app.utils.database import Base
 
 
 class HabitConclusion(Base):
     __tablename__ = 'habits_conclusion'
+    __table_args__ = (
+        UniqueConstraint(
+            'habit_id',
+            'conclusion_date',
+            name='uq_habits_conclusion_habit_id_conclusion_date',
+        ),
+        Index(
+            'ix_habits_conclusion_habit_id_change_xid_change_seq',
+            'habit_id',
+            'change_xid',
+            'change_seq',
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True, index=True, autoincrement=True
     )
-    habit_id: Mapped[int] = mapped_column(ForeignKey('habits.id'))
+    habit_id: Mapped[int] = mapped_column(
+        ForeignKey('habits.id', ondelete='CASCADE')
+    )
+    conclusion_date: Mapped[date] = mapped_column(default=func.current_date())
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        change_sequence,
+        server_default=change_sequence.next_value(),
+    )
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=current_xid
+    )
     created_at: Mapped[datetime] = mapped_column(default=func.now())
 
     def __init__(self, habit_id):
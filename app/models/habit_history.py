@@ -0,0 +1,19 @@
+from sqlalchemy import ForeignKey, SmallInteger
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.utils.database import Base
+
+DAYS_PER_YEAR_ROW = 366
+
+
+class HabitHistory(Base):
+    # One row per habit and year; bit n (leftmost is 0) is set when the
+    # habit was concluded on day n + 1 of that year.
+    __tablename__ = 'habit_history'
+
+    habit_id: Mapped[int] = mapped_column(
+        ForeignKey('habits.id', ondelete='CASCADE'), primary_key=True
+    )
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    bits: Mapped[str] = mapped_column(BIT(DAYS_PER_YEAR_ROW), nullable=False)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.change_sequence import change_sequence, current_xid
+from app.utils.database import Base
+
+
+class HabitTombstone(Base):
+    __tablename__ = 'habit_tombstones'
+    __table_args__ = (
+        Index(
+            'ix_habit_tombstones_user_id_change_xid_change_seq',
+            'user_id',
+            'change_xid',
+            'change_seq',
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    entity: Mapped[str] = mapped_column(nullable=False)
+    entity_id: Mapped[int] = mapped_column(nullable=False)
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        change_sequence,
+        server_default=change_sequence.next_value(),
+    )
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=current_xid
+    )
+    deleted_at: Mapped[datetime] = mapped_column(default=func.now())
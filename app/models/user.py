@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import BigInteger, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.utils.database import Base
@@ -19,6 +19,11 @@ class User(Base):
     password: Mapped[str] = mapped_column(nullable=False)
     is_active: Mapped[bool] = mapped_column(default=True)
     is_admin: Mapped[bool] = mapped_column(default=False)
+    # Bumped by every write to the user or their habits; read routes derive
+    # their ETags from it.
+    data_version: Mapped[int] = mapped_column(
+        BigInteger, default=1, server_default='1'
+    )
     updated_at: Mapped[datetime] = mapped_column(default=func.now())
     created_at: Mapped[datetime] = mapped_column(default=func.now())
 
@@ -35,3 +40,19 @@ class User(Base):
         self.password = password
         self.is_active = is_active
         self.is_admin = is_admin
+
+
+# Prefix search in the admin directory (lower(col) LIKE 'prefix%')
+Index(
+    'ix_users_email_lower_pattern',
+    func.lower(User.email).label('email_lower'),
+    postgresql_ops={'email_lower': 'text_pattern_ops'},
+)
+Index(
+    'ix_users_username_lower_pattern',
+    func.lower(User.username).label('username_lower'),
+    postgresql_ops={'username_lower': 'text_pattern_ops'},
+)
+# Keyset scans over the rare sides of the directory flag filters
+Index('ix_users_id_admin', User.id, postgresql_where=User.is_admin)
+Index('ix_users_id_inactive', User.id, postgresql_where=~User.is_active)
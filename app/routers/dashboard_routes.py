@@ -0,0 +1,37 @@
+from typing import Annotated
+
+from fastapi import APIRouter, status
+from fastapi.params import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.schemas.dashboard_schema import DashboardOut
+from app.schemas.error_schema import ErrorResponse
+from app.schemas.response import BaseResponse
+from app.services.dashboard_service import DashboardService
+from app.utils.conditional import check_fresh_user_version
+from app.utils.database import get_db
+
+dashboard_router = APIRouter(prefix='/dashboard', tags=['dashboard'])
+
+Session = Annotated[AsyncSession, Depends(get_db)]
+# Answers 304 off the user's data_version before any habit is loaded
+FreshUser = Annotated[User, Depends(check_fresh_user_version)]
+
+
+@dashboard_router.get(
+    '',
+    response_model=BaseResponse[DashboardOut],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {'model': BaseResponse[DashboardOut]},
+        status.HTTP_401_UNAUTHORIZED: {'model': ErrorResponse},
+    },
+)
+async def get_dashboard(user: FreshUser, db: Session):
+    response = await DashboardService.get_dashboard(user, db)
+    return BaseResponse(
+        status='success',
+        message='Dashboard returned successfully',
+        data=response,
+    )
@@ -1,27 +1,50 @@
-from typing import Annotated
+from datetime import date
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Query, Response, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Header,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.params import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.schemas.error_schema import ErrorResponse
 from app.schemas.habit_schema import (
+    HabitBatch,
+    HabitBatchResult,
+    HabitChanges,
     HabitConclusionReturn,
     HabitConclusionUnmarkReturn,
     HabitCreate,
+    HabitHistoryQuery,
+    HabitHistoryReturn,
     HabitReturn,
     HabitUpdate,
 )
 from app.schemas.response import BaseResponse
+from app.services.habit_batch_service import HabitBatchService
 from app.services.habit_service import HabitService
+from app.utils.conditional import (
+    check_data_version,
+    check_etag,
+    habit_etag,
+    make_etag,
+)
 from app.utils.database import get_db
-from app.utils.security import verify_token
+from app.utils.security import Principal, verify_token, verify_token_claims
 
 habit_router = APIRouter(prefix='/habit', tags=['habit'])
 
 Session = Annotated[AsyncSession, Depends(get_db)]
 CurrentUser = Annotated[User, Depends(verify_token)]
+CurrentPrincipal = Annotated[Principal, Depends(verify_token_claims)]
+VersionedPrincipal = Annotated[Principal, Depends(check_data_version)]
 
 
 @habit_router.post(
@@ -46,6 +69,49 @@ async def create_habit(
     )
 
 
+@habit_router.post(
+    '/bulk-create',
+    response_model=BaseResponse[list[HabitReturn]],
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_201_CREATED: {'model': BaseResponse[list[HabitReturn]]},
+        status.HTTP_400_BAD_REQUEST: {'model': ErrorResponse},
+    },
+)
+async def create_habits(
+    data: Annotated[list[HabitCreate], Body(min_length=1, max_length=100)],
+    user: CurrentUser,
+    db: Session,
+):
+    response = await HabitService.create_habits(data, user, db)
+    return BaseResponse(
+        status='success',
+        message='Habits created successfully',
+        data=response,
+    )
+
+
+@habit_router.post(
+    '/batch',
+    response_model=BaseResponse[list[HabitBatchResult]],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {'model': BaseResponse[list[HabitBatchResult]]},
+    },
+)
+async def apply_habit_batch(
+    data: HabitBatch,
+    user: CurrentUser,
+    db: Session,
+):
+    response = await HabitBatchService.apply_batch(data, user, db)
+    return BaseResponse(
+        status='success',
+        message='Batch applied',
+        data=response,
+    )
+
+
 @habit_router.get(
     '/',
     response_model=BaseResponse[list[HabitReturn]],
@@ -54,12 +120,21 @@ async def create_habit(
         status.HTTP_200_OK: {'model': BaseResponse[list[HabitReturn]]},
     },
 )
-async def get_all_habit_by_user(user: CurrentUser, db: Session):
-    response = await HabitService.get_habits_by_user_id(user, db)
+async def get_all_habit_by_user(
+    user: VersionedPrincipal,
+    db: Session,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: Annotated[Optional[str], Query()] = None,
+    unpaginated: Annotated[bool, Query()] = False,
+):
+    response, next_cursor = await HabitService.get_habits_by_user_id(
+        user, db, limit=None if unpaginated else limit, cursor=cursor
+    )
     return BaseResponse(
         status='success',
         message='Get all habit for this user',
         data=response,
+        next_cursor=next_cursor,
     )
 
 
@@ -134,15 +209,19 @@ async def unmark_done(
     },
 )
 async def get_habits_completed_by_day(
-    user: CurrentUser,
+    user: VersionedPrincipal,
     db: Session,
-    date=Query(..., alias='date'),
+    date: Annotated[date, Query(alias='date')],
+    response: Response,
 ):
-    response = await HabitService.get_habits_completed_by_day(date, user, db)
+    habits = await HabitService.get_habits_completed_by_day(date, user, db)
+    # Batch replays can still change past days, so clients revalidate
+    # against the data_version ETag instead of trusting a max-age.
+    response.headers['Cache-Control'] = 'private, no-cache'
     return BaseResponse(
         status='success',
         message=f'Habits completed in date {date}',
-        data=response,
+        data=habits,
     )
 
 
@@ -156,10 +235,51 @@ async def get_habits_completed_by_day(
         },
     },
 )
-async def get_upcoming_habits(user: CurrentUser, db: Session):
-    response = await HabitService.get_upcoming_habits(user, db)
+async def get_upcoming_habits(
+    user: CurrentPrincipal,
+    db: Session,
+    request: Request,
+    response: Response,
+):
+    habits = await HabitService.get_upcoming_habits(user, db)
+    # Tagged from the cached today view, so a match needs no query at all
+    check_etag(
+        request,
+        response,
+        make_etag(
+            user.id,
+            date.today(),
+            *(habit.model_dump_json() for habit in habits),
+        ),
+    )
     return BaseResponse(
-        status='success', message='Habits upcoming today', data=response
+        status='success', message='Habits upcoming today', data=habits
+    )
+
+
+@habit_router.get(
+    '/changes',
+    response_model=BaseResponse[HabitChanges],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {'model': BaseResponse[HabitChanges]},
+        status.HTTP_400_BAD_REQUEST: {'model': ErrorResponse},
+    },
+)
+async def get_habit_changes(
+    user: CurrentPrincipal,
+    db: Session,
+    since: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 500,
+):
+    response, next_cursor = await HabitService.get_changes(
+        user, db, since, limit
+    )
+    return BaseResponse(
+        status='success',
+        message='Habit changes',
+        data=response,
+        next_cursor=next_cursor,
     )
 
 
@@ -177,10 +297,42 @@ async def get_habit_by_id(
     id: int,
     user: CurrentUser,
     db: Session,
+    request: Request,
+    response: Response,
 ):
-    response = await HabitService.get_habit_by_id(id, user, db)
+    if request.headers.get('if-none-match'):
+        # Revalidation reads only the revision, so a 304 never loads and
+        # serializes the habit
+        revision = await HabitService.get_habit_revision(id, user, db)
+        check_etag(request, response, habit_etag(*revision))
+
+    habit, change_seq = await HabitService.get_habit_by_id(id, user, db)
+    response.headers['ETag'] = habit_etag(habit.version, change_seq)
     return BaseResponse(
-        status='success', message='Habit return successfully', data=response
+        status='success', message='Habit return successfully', data=habit
+    )
+
+
+@habit_router.get(
+    '/{id}/history',
+    response_model=BaseResponse[HabitHistoryReturn],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {'model': BaseResponse[HabitHistoryReturn]},
+        status.HTTP_400_BAD_REQUEST: {'model': ErrorResponse},
+        status.HTTP_401_UNAUTHORIZED: {'model': ErrorResponse},
+        status.HTTP_404_NOT_FOUND: {'model': ErrorResponse},
+    },
+)
+async def get_habit_history(
+    id: int,
+    user: CurrentUser,
+    db: Session,
+    query: Annotated[HabitHistoryQuery, Query()],
+):
+    response = await HabitService.get_habit_history(id, query, user, db)
+    return BaseResponse(
+        status='success', message='Habit history', data=response
     )
 
 
@@ -192,6 +344,7 @@ async def get_habit_by_id(
         status.HTTP_200_OK: {'model': BaseResponse[HabitReturn]},
         status.HTTP_401_UNAUTHORIZED: {'model': ErrorResponse},
         status.HTTP_404_NOT_FOUND: {'model': ErrorResponse},
+        status.HTTP_409_CONFLICT: {'model': ErrorResponse},
     },
 )
 async def update_habit_by_id(
@@ -199,10 +352,13 @@ async def update_habit_by_id(
     data: HabitUpdate,
     user: CurrentUser,
     db: Session,
+    if_match: Annotated[Optional[str], Header()] = None,
 ):
-    response = await HabitService.update_habit_by_id(id, data, user, db)
+    habit = await HabitService.update_habit_by_id(
+        id, data, user, db, if_match=if_match
+    )
     return BaseResponse(
         status='success',
         message='Habit updated successfully',
-        data=response,
+        data=habit,
     )
@@ -1,26 +1,41 @@
 from typing import Annotated
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, status
 from fastapi.params import Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.schemas.error_schema import ErrorResponse
+from app.schemas.metrics_schema import MetricsOut
 from app.schemas.response import BaseResponse
 from app.schemas.user_schema import (
     UserCreate,
+    UserDirectoryFilter,
+    UserDirectoryPage,
     UserOut,
     UserOutFull,
     UserUpdate,
 )
 from app.services.user_service import UserService
+from app.utils.completed_cache import completed_cache
+from app.utils.conditional import check_user_version
 from app.utils.database import get_db
-from app.utils.security import verify_admin, verify_token
+from app.utils.security import (
+    password_hasher,
+    user_cache,
+    verify_admin,
+    verify_token,
+    verify_token_allow_inactive,
+)
+from app.utils.today_cache import today_cache
 
 user_router = APIRouter(prefix='/user', tags=['user'])
 
 Session = Annotated[AsyncSession, Depends(get_db)]
 CurrentUser = Annotated[User, Depends(verify_token)]
+InactiveUser = Annotated[User, Depends(verify_token_allow_inactive)]
+VersionedUser = Annotated[User, Depends(check_user_version)]
 
 
 @user_router.post(
@@ -90,7 +105,7 @@ async def deactivate_user(db: Session, user: CurrentUser):
         status.HTTP_404_NOT_FOUND: {'model': ErrorResponse},
     },
 )
-async def activate_user(db: Session, user: CurrentUser):
+async def activate_user(db: Session, user: InactiveUser):
     response = await UserService.activate_user(user, db)
     return BaseResponse(
         status='success',
@@ -108,7 +123,7 @@ async def activate_user(db: Session, user: CurrentUser):
         status.HTTP_404_NOT_FOUND: {'model': ErrorResponse},
     },
 )
-async def get_user(user: CurrentUser, db: Session):
+async def get_user(user: VersionedUser, db: Session):
     return BaseResponse(
         status='success',
         message='User returned successfully',
@@ -128,10 +143,50 @@ async def get_user(user: CurrentUser, db: Session):
     },
     dependencies=[Depends(verify_admin)],
 )
-async def get_all_users(db: Session):
-    response = await UserService.get_all_users(db)
+async def get_all_users(
+    db: Session, page: Annotated[UserDirectoryPage, Query()]
+):
+    response, next_cursor = await UserService.get_all_users(db, page)
     return BaseResponse(
         status='success',
         message='All users returned successfully',
         data=response,
+        next_cursor=next_cursor,
+    )
+
+
+@user_router.get(
+    '/all-users/export',
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(verify_admin)],
+)
+async def export_all_users(
+    db: Session, filters: Annotated[UserDirectoryFilter, Query()]
+):
+    return StreamingResponse(
+        UserService.export_users(db, filters),
+        media_type='application/x-ndjson',
+    )
+
+
+@user_router.get(
+    '/metrics',
+    response_model=BaseResponse[MetricsOut],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {'model': BaseResponse[MetricsOut]},
+    },
+    dependencies=[Depends(verify_admin)],
+)
+async def get_metrics():
+    return BaseResponse(
+        status='success',
+        message='Metrics returned successfully',
+        data=MetricsOut(
+            password_hashing=password_hasher.metrics.snapshot(),
+            user_cache=user_cache.snapshot(),
+            today_cache=today_cache.snapshot(),
+            completed_cache=completed_cache.snapshot(),
+        ),
     )
@@ -0,0 +1,17 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from app.schemas.habit_schema import HabitReturn
+from app.schemas.user_schema import UserOut
+
+
+class DashboardHabit(HabitReturn):
+    scheduled_today: bool
+    done_today: bool
+
+
+class DashboardOut(BaseModel):
+    user: UserOut
+    today: date
+    habits: list[DashboardHabit]
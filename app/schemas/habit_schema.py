@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class HabitCreate(BaseModel):
@@ -15,6 +15,11 @@ class HabitReturn(BaseModel):
     name: str
     description: str
     frequency: list[str]
+    version: int
+    current_streak: int
+    longest_streak: int
+    total_completions: int
+    last_completed_at: Optional[date]
 
     model_config = {'from_attributes': True}
 
@@ -37,3 +42,57 @@ class HabitUpdate(BaseModel):
     name: Optional[str] = ''
     description: Optional[str] = ''
     frequency: Optional[list[int]] = []
+    version: Optional[int] = None
+
+
+class HabitConclusionChange(BaseModel):
+    id: int
+    habit_id: int
+    conclusion_date: date
+    created_at: datetime
+
+    model_config = {'from_attributes': True}
+
+
+class HabitHistoryQuery(BaseModel):
+    start: Optional[date] = Field(None, alias='from')
+    end: Optional[date] = Field(None, alias='to')
+    format: Literal['bitmap', 'dates'] = 'bitmap'
+
+
+class HabitHistoryReturn(BaseModel):
+    habit_id: int
+    start: date
+    end: date
+    bitmap: Optional[str] = None
+    dates: Optional[list[date]] = None
+
+
+class HabitTombstoneReturn(BaseModel):
+    entity: str
+    id: int
+
+
+class HabitChanges(BaseModel):
+    habits: list[HabitReturn]
+    conclusions: list[HabitConclusionChange]
+    deleted: list[HabitTombstoneReturn]
+    has_more: bool = False
+
+
+class HabitBatchOperation(BaseModel):
+    op: Literal['create', 'update', 'mark', 'unmark']
+    habit_id: Optional[int] = None
+    conclusion_date: Optional[date] = None
+    habit: Optional[HabitUpdate] = None
+
+
+class HabitBatch(BaseModel):
+    operations: list[HabitBatchOperation] = Field(max_length=1000)
+
+
+class HabitBatchResult(BaseModel):
+    index: int
+    status: Literal['success', 'error']
+    message: Optional[str] = None
+    habit_id: Optional[int] = None
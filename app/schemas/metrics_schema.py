@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+
+class PasswordHashMetricsOut(BaseModel):
+    completed: int
+    rejected: int
+    in_flight: int
+    queue_wait_total: float
+    queue_wait_max: float
+    hash_time_total: float
+    hash_time_max: float
+
+
+class CacheMetricsOut(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class MetricsOut(BaseModel):
+    password_hashing: PasswordHashMetricsOut
+    user_cache: CacheMetricsOut
+    today_cache: CacheMetricsOut
+    completed_cache: CacheMetricsOut
@@ -15,3 +15,4 @@ class BaseResponse(BaseModel, Generic[T]):
     status: StatusEnum
     message: str
     data: Optional[T] = None
+    next_cursor: Optional[str] = None
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class UserCreate(BaseModel):
@@ -33,3 +33,14 @@ class UserOutFull(BaseModel):
     is_active: bool
 
     model_config = {'from_attributes': True}
+
+
+class UserDirectoryFilter(BaseModel):
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+    q: Optional[str] = Field(None, max_length=254)
+
+
+class UserDirectoryPage(UserDirectoryFilter):
+    limit: int = Field(50, ge=1, le=200)
+    cursor: Optional[str] = None
@@ -7,7 +7,7 @@ from app.exceptions.api_exception import BadRequestException
 from app.models.user import User
 from app.schemas.authenticate_schema import LoginReturn, LoginUser
 from app.schemas.token_schema import RefreshTokenResponse
-from app.utils.security import AuthLogin, bcrypt_context
+from app.utils.security import AuthLogin, password_hasher
 
 
 class AuthService:
@@ -19,11 +19,15 @@ class AuthService:
 
         if not user:
             raise BadRequestException('Invalid email or password')
-        elif not bcrypt_context.verify(data.password, user.password):
+        elif not await password_hasher.verify(data.password, user.password):
             raise BadRequestException('Invalid email or password')
 
-        access_token = AuthLogin.generate_token(user.id)
-        refresh_token = AuthLogin.generate_token(user.id, timedelta(days=7))
+        access_token = AuthLogin.generate_token(
+            user.id, is_admin=user.is_admin
+        )
+        refresh_token = AuthLogin.generate_token(
+            user.id, timedelta(days=7), is_admin=user.is_admin
+        )
 
         userLogged = LoginReturn(
             access_token=access_token, refresh_token=refresh_token
@@ -33,7 +37,9 @@ class AuthService:
 
     @staticmethod
     def refresh_token(user: User) -> RefreshTokenResponse:
-        access_token = AuthLogin.generate_token(user.id)
+        access_token = AuthLogin.generate_token(
+            user.id, is_admin=user.is_admin
+        )
 
         token = RefreshTokenResponse(access_token=access_token)
 
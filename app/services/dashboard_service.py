@@ -0,0 +1,60 @@
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.habit import Habit
+from app.models.habit_conclution import HabitConclusion
+from app.models.user import User
+from app.schemas.dashboard_schema import DashboardHabit, DashboardOut
+from app.schemas.user_schema import UserOut
+from app.services.habit_service import HabitService
+from app.utils.today_cache import TodayView, today_cache
+from app.utils.week_days import today_week_day, week_day_bit
+
+
+class DashboardService:
+    @staticmethod
+    async def get_dashboard(user: User, db: AsyncSession) -> DashboardOut:
+        # Completion counts come from the habits' streak counters, so one
+        # join against today's conclusions covers every habit.
+        result = await db.execute(
+            select(Habit, HabitConclusion.id.is_not(None).label('done'))
+            .outerjoin(
+                HabitConclusion,
+                (HabitConclusion.habit_id == Habit.id)
+                & (HabitConclusion.conclusion_date == func.current_date()),
+            )
+            .where(Habit.user_id == user.id)
+            .order_by(Habit.id)
+            .execution_options(populate_existing=True)
+        )
+
+        today_bit = week_day_bit(today_week_day())
+        view = TodayView(day=date.today(), habits={})
+        habits = []
+        for habit, done in result:
+            habit_return = HabitService._to_return(habit)
+            scheduled = bool(habit.frequency_mask & today_bit)
+            if scheduled:
+                view.habits[habit.id] = habit_return
+                if done:
+                    view.done.add(habit.id)
+
+            habits.append(
+                DashboardHabit(
+                    **habit_return.model_dump(),
+                    scheduled_today=scheduled,
+                    done_today=done,
+                )
+            )
+
+        # The same rows make up today's view, so /habit/upcoming is served
+        # from memory afterwards.
+        today_cache.set(user.id, view)
+
+        return DashboardOut(
+            user=UserOut.model_validate(user),
+            today=view.day,
+            habits=habits,
+        )
@@ -0,0 +1,342 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.habit import Habit
+from app.models.habit_conclution import HabitConclusion
+from app.models.user import User
+from app.schemas.habit_schema import (
+    HabitBatch,
+    HabitBatchOperation,
+    HabitBatchResult,
+)
+from app.services.habit_history_service import HabitHistoryService
+from app.services.habit_service import HabitService
+from app.services.streak_service import StreakService
+from app.services.user_service import UserService
+from app.utils.completed_cache import completed_cache
+from app.utils.database import violated_constraint
+from app.utils.today_cache import today_cache
+from app.utils.week_days import week_day_bit, week_day_of, week_days_to_mask
+
+
+@dataclass
+class _BatchPlan:
+    habits: dict[int, dict]
+    names: dict[str, Optional[int]]
+    done: set[tuple[int, date]]
+    today: date
+    creates: list[dict] = field(default_factory=list)
+    updated: set[int] = field(default_factory=set)
+    renamed: set[int] = field(default_factory=set)
+    rescheduled: set[int] = field(default_factory=set)
+    concluded: dict[tuple[int, date], bool] = field(default_factory=dict)
+
+    def create(self, operation: HabitBatchOperation) -> Optional[str]:
+        data = operation.habit
+        if not data or not data.name:
+            return 'Habit name is required'
+        if data.name in self.names:
+            return 'This habit alreary exists'
+
+        self.names[data.name] = None
+        self.creates.append({
+            'name': data.name,
+            'description': data.description or '',
+            'frequency_mask': week_days_to_mask(data.frequency or []),
+        })
+        return None
+
+    def update(self, operation: HabitBatchOperation) -> Optional[str]:
+        habit = self.habits.get(operation.habit_id)
+        data = operation.habit
+        if not habit:
+            return 'Habit not found'
+        if not data:
+            return 'Habit data is required'
+        if data.version is not None and data.version != habit['version']:
+            return 'This habit was modified by another request'
+
+        if data.name and data.name != habit['name']:
+            if data.name in self.names:
+                return 'This habit alreary exists'
+            del self.names[habit['name']]
+            self.names[data.name] = habit['id']
+            habit['name'] = data.name
+            self.renamed.add(habit['id'])
+        if data.description:
+            habit['description'] = data.description
+        if data.frequency:
+            habit['frequency_mask'] = week_days_to_mask(data.frequency)
+            self.rescheduled.add(habit['id'])
+
+        habit['version'] += 1
+        self.updated.add(habit['id'])
+        return None
+
+    def _conclusion_key(
+        self, operation: HabitBatchOperation
+    ) -> tuple[Optional[tuple[int, date]], Optional[str]]:
+        if operation.habit_id not in self.habits:
+            return None, 'Habit not found'
+        if not operation.conclusion_date:
+            return None, 'Conclusion date is required'
+        if operation.conclusion_date > self.today:
+            return None, 'Conclusion date cannot be in the future'
+        return (operation.habit_id, operation.conclusion_date), None
+
+    def is_concluded(self, key: tuple[int, date]) -> bool:
+        return self.concluded.get(key, key in self.done)
+
+    def mark(self, operation: HabitBatchOperation) -> Optional[str]:
+        key, error = self._conclusion_key(operation)
+        if error:
+            return error
+
+        day_bit = week_day_bit(week_day_of(operation.conclusion_date))
+        if not self.habits[operation.habit_id]['frequency_mask'] & day_bit:
+            return 'This habit is not set for this day'
+        if self.is_concluded(key):
+            return 'This habit has already been established this day.'
+
+        self.concluded[key] = True
+        return None
+
+    def unmark(self, operation: HabitBatchOperation) -> Optional[str]:
+        key, error = self._conclusion_key(operation)
+        if error:
+            return error
+        if not self.is_concluded(key):
+            return 'This habit was not conclusion yet'
+
+        self.concluded[key] = False
+        return None
+
+    @property
+    def has_writes(self) -> bool:
+        return bool(
+            self.creates
+            or self.updated
+            or self.changed_conclusions(True)
+            or self.changed_conclusions(False)
+        )
+
+    def changed_conclusions(self, concluded: bool) -> list[tuple[int, date]]:
+        # Mark/unmark pairs on the same day cancel out and never reach the
+        # database.
+        return [
+            key
+            for key, value in self.concluded.items()
+            if value is concluded and (key in self.done) is not concluded
+        ]
+
+
+class HabitBatchService:
+    @staticmethod
+    async def _plan(
+        batch: HabitBatch, user: User, db: AsyncSession
+    ) -> _BatchPlan:
+        operations = batch.operations
+        habit_ids = {op.habit_id for op in operations if op.habit_id}
+        names = {
+            op.habit.name for op in operations if op.habit and op.habit.name
+        }
+
+        habits = {}
+        if habit_ids:
+            # Locked so the versions checked here still hold at UPDATE time
+            rows = await db.execute(
+                select(
+                    Habit.id,
+                    Habit.name,
+                    Habit.description,
+                    Habit.frequency_mask,
+                    Habit.version,
+                )
+                .where(Habit.user_id == user.id, Habit.id.in_(habit_ids))
+                .with_for_update()
+            )
+            habits = {row.id: row._asdict() for row in rows}
+
+        taken = {habit['name']: habit['id'] for habit in habits.values()}
+        if names:
+            rows = await db.execute(
+                select(Habit.id, Habit.name).where(
+                    Habit.user_id == user.id, Habit.name.in_(names)
+                )
+            )
+            taken.update({row.name: row.id for row in rows})
+
+        keys = {
+            (op.habit_id, op.conclusion_date)
+            for op in operations
+            if op.op in {'mark', 'unmark'}
+            and op.habit_id in habits
+            and op.conclusion_date
+        }
+        done = set()
+        if keys:
+            rows = await db.execute(
+                select(
+                    HabitConclusion.habit_id, HabitConclusion.conclusion_date
+                ).where(
+                    tuple_(
+                        HabitConclusion.habit_id,
+                        HabitConclusion.conclusion_date,
+                    ).in_(keys)
+                )
+            )
+            done = {tuple(row) for row in rows}
+
+        return _BatchPlan(
+            habits=habits, names=taken, done=done, today=date.today()
+        )
+
+    @staticmethod
+    async def _update_habit(db: AsyncSession, rows: list[dict]) -> bool:
+        try:
+            async with db.begin_nested():
+                await db.execute(update(Habit), rows)
+        except IntegrityError as exc:
+            if violated_constraint(exc) != 'uq_habits_user_id_name':
+                raise
+            return False
+        return True
+
+    @staticmethod
+    async def _update_habits(plan: _BatchPlan, db: AsyncSession) -> set[int]:
+        rows = [plan.habits[habit_id] for habit_id in sorted(plan.updated)]
+        if not plan.renamed:
+            await db.execute(update(Habit), rows)
+            return set()
+        if await HabitBatchService._update_habit(db, rows):
+            return set()
+
+        # A new name can still be held by a habit renamed later in the same
+        # statement, or taken by a request that committed after _plan read
+        # the names. Habits are retried one by one until none gets through;
+        # the ones left over are reported as duplicates.
+        pending = rows
+        while pending:
+            failed = [
+                row
+                for row in pending
+                if not await HabitBatchService._update_habit(db, [row])
+            ]
+            if len(failed) == len(pending):
+                break
+            pending = failed
+        return {row['id'] for row in pending}
+
+    @staticmethod
+    async def _write(
+        plan: _BatchPlan, user: User, db: AsyncSession
+    ) -> tuple[dict[str, int], set[int]]:
+        rejected = set()
+        if plan.updated:
+            rejected = await HabitBatchService._update_habits(plan, db)
+
+        created = {}
+        if plan.creates:
+            rows = await db.execute(
+                pg_insert(Habit)
+                .values([
+                    {**values, 'user_id': user.id} for values in plan.creates
+                ])
+                .on_conflict_do_nothing(constraint='uq_habits_user_id_name')
+                .returning(Habit.id, Habit.name)
+            )
+            created = {row.name: row.id for row in rows}
+
+        marks = plan.changed_conclusions(True)
+        if marks:
+            inserted = (
+                pg_insert(HabitConclusion)
+                .values([
+                    {'habit_id': habit_id, 'conclusion_date': day}
+                    for habit_id, day in marks
+                ])
+                .on_conflict_do_nothing(
+                    index_elements=['habit_id', 'conclusion_date']
+                )
+                .returning(
+                    HabitConclusion.habit_id, HabitConclusion.conclusion_date
+                )
+                .cte('inserted')
+            )
+            await db.execute(
+                HabitHistoryService.marked(inserted).add_cte(inserted)
+            )
+
+        unmarks = plan.changed_conclusions(False)
+        if unmarks:
+            await db.execute(
+                HabitService._delete_conclusions(
+                    user.id,
+                    tuple_(
+                        HabitConclusion.habit_id,
+                        HabitConclusion.conclusion_date,
+                    ).in_(unmarks),
+                )
+            )
+
+        # Replayed days can land anywhere in a habit's history, so its
+        # streak counters are rebuilt rather than adjusted.
+        streaks = plan.rescheduled | {
+            habit_id for habit_id, _ in [*marks, *unmarks]
+        }
+        bump = UserService.data_version_bump(user.id)
+        if streaks:
+            # The data_version bump rides along to save a round trip
+            await db.execute(
+                StreakService.rebuild(streaks).add_cte(bump.cte('bump')),
+                execution_options={'synchronize_session': False},
+            )
+        elif plan.has_writes:
+            await db.execute(bump)
+
+        return created, rejected
+
+    @staticmethod
+    async def apply_batch(
+        batch: HabitBatch, user: User, db: AsyncSession
+    ) -> list[HabitBatchResult]:
+        plan = await HabitBatchService._plan(batch, user, db)
+
+        errors = []
+        for operation in batch.operations:
+            apply_operation = getattr(plan, operation.op)
+            errors.append(apply_operation(operation))
+
+        created, rejected = await HabitBatchService._write(plan, user, db)
+        await db.commit()
+        today_cache.invalidate(user.id)
+        completed_cache.invalidate(user.id)
+
+        results = []
+        for index, (operation, planned_error) in enumerate(
+            zip(batch.operations, errors)
+        ):
+            error, habit_id = planned_error, operation.habit_id
+            if operation.op == 'create' and not error:
+                habit_id = created.get(operation.habit.name)
+                if habit_id is None:
+                    error = 'This habit alreary exists'
+            if operation.op == 'update' and habit_id in rejected:
+                error = error or 'This habit alreary exists'
+
+            results.append(
+                HabitBatchResult(
+                    index=index,
+                    status='error' if error else 'success',
+                    message=error,
+                    habit_id=habit_id,
+                )
+            )
+
+        return results
@@ -0,0 +1,108 @@
+import base64
+from datetime import date, timedelta
+
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Insert,
+    Integer,
+    Select,
+    Update,
+    cast,
+    extract,
+    func,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.habit_history import DAYS_PER_YEAR_ROW, HabitHistory
+from app.schemas.habit_schema import HabitHistoryQuery, HabitHistoryReturn
+
+MAX_HISTORY_DAYS = 5 * DAYS_PER_YEAR_ROW
+
+
+class HabitHistoryService:
+    @staticmethod
+    def _day_bits(day: ColumnElement[date]) -> ColumnElement[str]:
+        empty = cast(literal_column("B'0'"), BIT(DAYS_PER_YEAR_ROW))
+        return func.set_bit(
+            empty,
+            extract('doy', day).cast(Integer) - 1,
+            1,
+            type_=BIT(DAYS_PER_YEAR_ROW),
+        )
+
+    @staticmethod
+    def _by_year(conclusions: CTE) -> Select:
+        # `conclusions` is any CTE returning habit_id and conclusion_date
+        day = conclusions.c.conclusion_date
+        year = extract('year', day).cast(Integer)
+        return select(
+            conclusions.c.habit_id,
+            year.label('year'),
+            func.bit_or(
+                HabitHistoryService._day_bits(day),
+                type_=BIT(DAYS_PER_YEAR_ROW),
+            ).label('bits'),
+        ).group_by(conclusions.c.habit_id, year)
+
+    @staticmethod
+    def marked(conclusions: CTE) -> Insert:
+        query = pg_insert(HabitHistory).from_select(
+            ['habit_id', 'year', 'bits'],
+            HabitHistoryService._by_year(conclusions),
+        )
+        return query.on_conflict_do_update(
+            index_elements=['habit_id', 'year'],
+            set_={'bits': HabitHistory.bits.op('|')(query.excluded.bits)},
+        )
+
+    @staticmethod
+    def unmarked(conclusions: CTE) -> Update:
+        cleared = HabitHistoryService._by_year(conclusions).subquery()
+        return (
+            update(HabitHistory)
+            .where(
+                HabitHistory.habit_id == cleared.c.habit_id,
+                HabitHistory.year == cleared.c.year,
+            )
+            .values(
+                bits=HabitHistory.bits.op('&')(cleared.c.bits.bitwise_not())
+            )
+        )
+
+    @staticmethod
+    def _range_bits(years: dict[int, str], start: date, end: date) -> str:
+        segments = []
+        for year in range(start.year, end.year + 1):
+            first = max(start, date(year, 1, 1)).timetuple().tm_yday - 1
+            last = min(end, date(year, 12, 31)).timetuple().tm_yday
+            bits = years.get(year) or '0' * DAYS_PER_YEAR_ROW
+            segments.append(bits[first:last])
+        return ''.join(segments)
+
+    @staticmethod
+    def to_return(
+        habit_id: int, years: dict[int, str], query: HabitHistoryQuery
+    ) -> HabitHistoryReturn:
+        bits = HabitHistoryService._range_bits(years, query.start, query.end)
+
+        history = HabitHistoryReturn(
+            habit_id=habit_id, start=query.start, end=query.end
+        )
+        if query.format == 'dates':
+            history.dates = [
+                query.start + timedelta(days=offset)
+                for offset, bit in enumerate(bits)
+                if bit == '1'
+            ]
+        else:
+            # Day `start + n` is bit n, most significant bit first
+            padded = bits.ljust(-(-len(bits) // 8) * 8, '0')
+            history.bitmap = base64.b64encode(
+                int(padded, 2).to_bytes(len(padded) // 8, 'big')
+            ).decode()
+        return history
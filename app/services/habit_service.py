@@ -1,292 +1,756 @@
-from datetime import date, datetime
-
-from sqlalchemy import func, select, text
+from datetime import date, timedelta
+from typing import NoReturn, Optional
+
+from sqlalchemy import (
+    CTE,
+    Delete,
+    Insert,
+    Row,
+    Select,
+    Update,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.exceptions.api_exception import (
     BadRequestException,
+    ConflictException,
     ForbiddenException,
     NotFoundException,
     UnauthorizedException,
 )
-from app.models.day import Day
+from app.models.change_sequence import snapshot_xmin
 from app.models.habit import Habit
 from app.models.habit_conclution import HabitConclusion
+from app.models.habit_history import HabitHistory
+from app.models.habit_tombstone import HabitTombstone
 from app.models.user import User
 from app.schemas.habit_schema import (
+    HabitChanges,
+    HabitConclusionChange,
     HabitConclusionReturn,
     HabitCreate,
+    HabitHistoryQuery,
+    HabitHistoryReturn,
     HabitReturn,
+    HabitTombstoneReturn,
     HabitUpdate,
 )
+from app.services.habit_history_service import (
+    MAX_HISTORY_DAYS,
+    HabitHistoryService,
+)
+from app.services.streak_service import StreakService
+from app.services.user_service import UserService
+from app.utils.completed_cache import (
+    completed_cache,
+    is_past,
+    recall_completed,
+    remember_completed,
+)
+from app.utils.database import violated_constraint
+from app.utils.pagination import (
+    decode_cursor,
+    decode_id_cursor,
+    decode_int_cursor,
+    encode_cursor,
+)
+from app.utils.security import Principal
+from app.utils.today_cache import TodayView, get_today_view, today_cache
+from app.utils.week_days import (
+    mask_to_week_day_names,
+    today_week_day,
+    week_day_bit,
+    week_days_to_mask,
+)
 
 
 class HabitService:
-    @staticmethod
-    async def create_habit(
-        data: HabitCreate, user: User, db: AsyncSession
-    ) -> HabitReturn:
-        existing_habit = await db.scalar(
-            select(Habit).where(
-                Habit.name == data.name, Habit.user_id == user.id
-            )
-        )
+    # Python-side column defaults are left NULL once an INSERT carries a
+    # CTE, so the inserts that bump the owner's data_version set them here.
+    _insert_defaults = {
+        'is_active': True,
+        'version': 1,
+        'current_streak': 0,
+        'longest_streak': 0,
+        'total_completions': 0,
+    }
 
-        if existing_habit:
-            raise BadRequestException('This habit alreary exists')
+    @staticmethod
+    def _scoped(
+        query: Select | Update | Delete, user: User | Principal
+    ) -> Select | Update | Delete:
+        # Only a caller loaded from the database counts as admin; the
+        # token's adm claim outlives a demotion until it expires.
+        if isinstance(user, User) and user.is_admin:
+            return query
+        return query.where(Habit.user_id == user.id)
 
-        get_days = await db.scalars(
-            select(Day).where(Day.id.in_(data.frequency))
+    @staticmethod
+    def _with_tombstone(entity: str, deleted_rows: CTE) -> Insert:
+        # Written by the same statement as the delete, so a sync client can
+        # never see the row disappear without its tombstone.
+        return (
+            insert(HabitTombstone)
+            .from_select(
+                ['user_id', 'entity', 'entity_id'],
+                select(
+                    deleted_rows.c.user_id,
+                    literal(entity),
+                    deleted_rows.c.id,
+                ),
+            )
+            .add_cte(deleted_rows)
+            .returning(HabitTombstone.entity_id, HabitTombstone.user_id)
         )
 
-        days: list[Day] = get_days.all()
-
-        habit = Habit(
-            name=data.name,
-            description=data.description,
-            frequency=days,
-            user_id=user.id,
+    @staticmethod
+    def _delete_conclusions(user_id: int, *criteria) -> Insert:
+        deleted_rows = (
+            delete(HabitConclusion)
+            .where(*criteria)
+            .returning(
+                HabitConclusion.id,
+                HabitConclusion.habit_id,
+                HabitConclusion.conclusion_date,
+                literal(user_id).label('user_id'),
+            )
+            .cte('deleted')
         )
+        return HabitService._with_tombstone(
+            'conclusion', deleted_rows
+        ).add_cte(HabitHistoryService.unmarked(deleted_rows).cte('history'))
 
-        db.add(habit)
-        await db.commit()
-        await db.refresh(habit)
+    @staticmethod
+    def _to_return(habit: Habit | Row) -> HabitReturn:
         return HabitReturn(
             id=habit.id,
+            version=habit.version,
             name=habit.name,
             description=habit.description,
-            frequency=[day.name for day in habit.frequency],
+            frequency=mask_to_week_day_names(habit.frequency_mask),
+            current_streak=StreakService.current_streak(
+                habit.current_streak,
+                habit.last_completed_at,
+                habit.frequency_mask,
+                date.today(),
+            ),
+            longest_streak=habit.longest_streak,
+            total_completions=habit.total_completions,
+            last_completed_at=habit.last_completed_at,
         )
 
     @staticmethod
-    async def get_habits_by_user_id(
-        user: User, db: AsyncSession
+    def _refresh_today(user_id: int, habit: HabitReturn, frequency_mask: int):
+        view = get_today_view(user_id)
+        if view is None:
+            return
+
+        if frequency_mask & week_day_bit(today_week_day()):
+            view.habits[habit.id] = habit
+        else:
+            # Done state is kept in case the habit is rescheduled today
+            view.habits.pop(habit.id, None)
+
+    @staticmethod
+    def _bump_owner(id: int) -> CTE:
+        owner = select(Habit.user_id).where(Habit.id == id).scalar_subquery()
+        return UserService.data_version_bump(owner).cte('bump')
+
+    @staticmethod
+    async def _raise_missing(id: int, db: AsyncSession) -> NoReturn:
+        # Only reached once the scoped lookup came back empty, to tell a
+        # foreign habit apart from one that doesn't exist.
+        if await db.scalar(select(Habit.id).where(Habit.id == id)):
+            raise UnauthorizedException()
+        raise NotFoundException('Habit')
+
+    @staticmethod
+    async def _raise_duplicate(
+        exc: IntegrityError, db: AsyncSession
+    ) -> NoReturn:
+        await db.rollback()
+        if violated_constraint(exc) == 'uq_habits_user_id_name':
+            raise BadRequestException('This habit alreary exists') from exc
+        raise exc
+
+    @staticmethod
+    async def _get_scoped_habit(
+        id: int, user: User | Principal, db: AsyncSession
+    ) -> Habit:
+        habit = await db.scalar(
+            HabitService._scoped(select(Habit).where(Habit.id == id), user)
+        )
+
+        if not habit:
+            await HabitService._raise_missing(id, db)
+
+        return habit
+
+    @staticmethod
+    async def create_habit(
+        data: HabitCreate, user: User, db: AsyncSession
+    ) -> HabitReturn:
+        try:
+            habit = await db.scalar(
+                insert(Habit)
+                .values(
+                    name=data.name,
+                    description=data.description,
+                    frequency_mask=week_days_to_mask(data.frequency),
+                    user_id=user.id,
+                    **HabitService._insert_defaults,
+                )
+                .returning(Habit)
+                .add_cte(UserService.data_version_bump(user.id).cte('bump'))
+            )
+            await db.commit()
+        except IntegrityError as exc:
+            await HabitService._raise_duplicate(exc, db)
+
+        habit_return = HabitService._to_return(habit)
+        HabitService._refresh_today(
+            habit.user_id, habit_return, habit.frequency_mask
+        )
+        return habit_return
+
+    @staticmethod
+    async def create_habits(
+        data: list[HabitCreate], user: User, db: AsyncSession
     ) -> list[HabitReturn]:
-        get_all_habits = await db.scalars(
-            select(Habit).where(Habit.user_id == user.id)
+        if len({habit.name for habit in data}) != len(data):
+            raise BadRequestException('This habit alreary exists')
+
+        try:
+            habits = await db.scalars(
+                insert(Habit).returning(Habit, sort_by_parameter_order=True),
+                [
+                    {
+                        'name': habit.name,
+                        'description': habit.description,
+                        'frequency_mask': week_days_to_mask(habit.frequency),
+                        'user_id': user.id,
+                    }
+                    for habit in data
+                ],
+            )
+            created = habits.all()
+            # Bulk INSERTs can't carry the bump as a CTE
+            await db.execute(UserService.data_version_bump(user.id))
+            await db.commit()
+        except IntegrityError as exc:
+            await HabitService._raise_duplicate(exc, db)
+
+        today_cache.invalidate(user.id)
+
+        return [HabitService._to_return(habit) for habit in created]
+
+    @staticmethod
+    async def get_habits_by_user_id(
+        user: Principal,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[HabitReturn], Optional[str]]:
+        query = (
+            select(Habit).where(Habit.user_id == user.id).order_by(Habit.id)
         )
 
+        if cursor:
+            query = query.where(Habit.id > decode_id_cursor(cursor))
+
+        if limit is not None:
+            # One extra row tells whether another page exists
+            query = query.limit(limit + 1)
+
+        get_all_habits = await db.scalars(query)
+
         all_habits = get_all_habits.all()
 
+        next_cursor = None
+        if limit is not None and len(all_habits) > limit:
+            all_habits = all_habits[:limit]
+            next_cursor = encode_cursor({'id': all_habits[-1].id})
+
         formated_habits = [
-            HabitReturn(
-                id=habit.id,
-                name=habit.name,
-                description=habit.description,
-                frequency=[day.name for day in habit.frequency],
-            )
-            for habit in all_habits
+            HabitService._to_return(habit) for habit in all_habits
         ]
-        return formated_habits
+        return formated_habits, next_cursor
 
     @staticmethod
-    async def delet_habit(
-        id: int, user: User, db: AsyncSession
-    ) -> HabitReturn:
-        existing_habit = await db.scalar(select(Habit).where(Habit.id == id))
-
-        if not existing_habit:
-            raise NotFoundException('Habit')
+    async def delet_habit(id: int, user: User, db: AsyncSession):
+        # Conclusions go with the habit through ON DELETE CASCADE
+        result = await db.execute(
+            HabitService._with_tombstone(
+                'habit',
+                HabitService
+                ._scoped(delete(Habit).where(Habit.id == id), user)
+                .returning(Habit.id, Habit.user_id)
+                .cte('deleted'),
+            ).add_cte(HabitService._bump_owner(id))
+        )
+        deleted = result.first()
 
-        if existing_habit.user_id != user.id and not user.is_admin:
-            raise UnauthorizedException()
+        if not deleted:
+            await db.rollback()
+            await HabitService._raise_missing(id, db)
 
-        await db.delete(existing_habit)
         await db.commit()
 
+        completed_cache.invalidate(deleted.user_id)
+        view = get_today_view(deleted.user_id)
+        if view is not None:
+            view.habits.pop(id, None)
+            view.done.discard(id)
+
     @staticmethod
     async def mark_conclusion(
         id: int, user: User, db: AsyncSession
     ) -> HabitConclusionReturn:
-        existing_habit = await db.scalar(
-            select(Habit)
-            .options(selectinload(Habit.frequency))
-            .where(Habit.id == id)
+        today_bit = week_day_bit(today_week_day())
+        habit = HabitService._scoped(
+            select(
+                Habit.id,
+                Habit.name,
+                Habit.description,
+                Habit.frequency_mask,
+                Habit.version,
+                Habit.user_id,
+            ).where(Habit.id == id),
+            user,
+        ).cte('habit')
+
+        # The unique (habit_id, conclusion_date) constraint decides whether
+        # the habit was already done today, so concurrent taps can't both
+        # insert and the whole check costs a single statement.
+        conclusion = (
+            pg_insert(HabitConclusion)
+            .from_select(
+                ['habit_id', 'conclusion_date', 'created_at'],
+                select(habit.c.id, func.current_date(), func.now()).where(
+                    habit.c.frequency_mask.op('&')(today_bit) != 0
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=['habit_id', 'conclusion_date']
+            )
+            .returning(
+                HabitConclusion.id,
+                HabitConclusion.habit_id,
+                HabitConclusion.conclusion_date,
+                HabitConclusion.created_at,
+            )
+            .cte('conclusion')
+        )
+        streak = (
+            update(Habit)
+            .where(Habit.id == conclusion.c.habit_id)
+            .values(**StreakService.marked_today())
+            .returning(
+                Habit.id,
+                Habit.current_streak,
+                Habit.longest_streak,
+                Habit.total_completions,
+                Habit.last_completed_at,
+            )
+            .cte('streak')
         )
 
-        if not existing_habit:
-            raise NotFoundException('Habit')
-
-        if existing_habit.user_id != user.id and not user.is_admin:
-            raise UnauthorizedException()
-
-        week_day = (datetime.now().weekday() + 1) % 7 + 1
+        result = await db.execute(
+            select(
+                habit,
+                conclusion.c.id.label('conclusion_id'),
+                conclusion.c.created_at,
+                streak.c.current_streak,
+                streak.c.longest_streak,
+                streak.c.total_completions,
+                streak.c.last_completed_at,
+            )
+            .select_from(
+                habit.outerjoin(conclusion, true()).outerjoin(
+                    streak, streak.c.id == habit.c.id
+                )
+            )
+            .add_cte(HabitService._bump_owner(id))
+            .add_cte(HabitHistoryService.marked(conclusion).cte('history'))
+        )
+        existing_habit = result.first()
 
-        habit_days = [d.id for d in existing_habit.frequency]
+        if not existing_habit:
+            await HabitService._raise_missing(id, db)
 
-        if week_day not in habit_days:
+        if not existing_habit.frequency_mask & today_bit:
             raise ForbiddenException('This habit is not set for today')
 
-        existing_conclusion = await db.scalar(
-            select(HabitConclusion).where(
-                HabitConclusion.habit_id == existing_habit.id,
-                text('created_at::date = NOW()::date'),
-            )
-        )
-
-        if existing_conclusion:
+        if existing_habit.conclusion_id is None:
             raise ForbiddenException(
                 'This habit has already been established today.'
             )
 
-        conclusion = HabitConclusion(habit_id=existing_habit.id)
-
-        db.add(conclusion)
         await db.commit()
-        await db.refresh(conclusion)
-        await db.refresh(existing_habit)
+
+        habit_return = HabitService._to_return(existing_habit)
+        view = get_today_view(existing_habit.user_id)
+        if view is not None:
+            view.habits[habit_return.id] = habit_return
+            view.done.add(habit_return.id)
+        completed_cache.invalidate(existing_habit.user_id)
 
         return HabitConclusionReturn(
-            id=conclusion.id,
-            created_at=conclusion.created_at,
-            habit=HabitReturn(
-                id=existing_habit.id,
-                name=existing_habit.name,
-                description=existing_habit.description,
-                frequency=[day.name for day in existing_habit.frequency],
-            ),
+            id=existing_habit.conclusion_id,
+            created_at=existing_habit.created_at,
+            habit=habit_return,
         )
 
     @staticmethod
     async def unmark_conclusion(id: int, user: User, db: AsyncSession):
-        existing_habit = await db.scalar(select(Habit).where(Habit.id == id))
-
-        if not existing_habit:
-            raise NotFoundException('Habit')
+        existing_habit = await HabitService._get_scoped_habit(id, user, db)
 
-        if existing_habit.user_id != user.id and not user.is_admin:
-            raise UnauthorizedException()
-
-        existing_conclusion = await db.scalar(
-            select(HabitConclusion).where(
+        deleted = await db.scalar(
+            HabitService._delete_conclusions(
+                existing_habit.user_id,
                 HabitConclusion.habit_id == existing_habit.id,
-                text('created_at::date = NOW()::date'),
+                HabitConclusion.conclusion_date == func.current_date(),
+            ).add_cte(
+                UserService.data_version_bump(existing_habit.user_id).cte(
+                    'bump'
+                )
             )
         )
 
-        if not existing_conclusion:
+        if not deleted:
             raise ForbiddenException('This habit was not conclusion yet')
 
-        await db.delete(existing_conclusion)
+        # Taking a day back can split a run or lower the longest streak, so
+        # the counters are rebuilt from the remaining history.
+        habit = await db.scalar(
+            StreakService.rebuild([existing_habit.id]).returning(Habit),
+            execution_options={
+                'synchronize_session': False,
+                'populate_existing': True,
+            },
+        )
         await db.commit()
 
+        view = get_today_view(existing_habit.user_id)
+        if view is not None:
+            view.done.discard(habit.id)
+        HabitService._refresh_today(
+            habit.user_id, HabitService._to_return(habit), habit.frequency_mask
+        )
+        completed_cache.invalidate(existing_habit.user_id)
+
     @staticmethod
-    async def get_habit_by_id(
-        id: int, user: User, db: AsyncSession
-    ) -> HabitReturn:
-        existing_habit = await db.scalar(select(Habit).where(Habit.id == id))
+    async def get_habit_revision(id: int, user: User, db: AsyncSession) -> Row:
+        result = await db.execute(
+            HabitService._scoped(
+                select(Habit.version, Habit.change_seq).where(Habit.id == id),
+                user,
+            )
+        )
+        revision = result.first()
 
-        if not existing_habit:
-            raise NotFoundException('Habit')
+        if not revision:
+            await HabitService._raise_missing(id, db)
 
-        if existing_habit.user_id != user.id and not user.is_admin:
-            raise UnauthorizedException()
+        return revision
 
-        return HabitReturn(
-            id=existing_habit.id,
-            name=existing_habit.name,
-            description=existing_habit.description,
-            frequency=[day.name for day in existing_habit.frequency],
+    @staticmethod
+    async def get_habit_by_id(
+        id: int, user: User, db: AsyncSession
+    ) -> tuple[HabitReturn, int]:
+        existing_habit = await HabitService._get_scoped_habit(id, user, db)
+
+        return (
+            HabitService._to_return(existing_habit),
+            existing_habit.change_seq,
         )
 
+    @staticmethod
+    def _parse_if_match(if_match: str) -> Optional[int]:
+        if if_match.strip() == '*':
+            return None
+        tag = if_match.strip().removeprefix('W/').strip('"').partition('.')[0]
+        if not tag.isdigit():
+            raise BadRequestException('Invalid If-Match header')
+        return int(tag)
+
     @staticmethod
     async def update_habit_by_id(
-        id: int, data: HabitUpdate, user: User, db: AsyncSession
+        id: int,
+        data: HabitUpdate,
+        user: User,
+        db: AsyncSession,
+        if_match: Optional[str] = None,
     ) -> HabitReturn:
-        existing_habit = await db.scalar(select(Habit).where(Habit.id == id))
-
-        if not existing_habit:
-            raise NotFoundException('Habit')
-
-        if existing_habit.user_id != user.id and not user.is_admin:
-            raise UnauthorizedException()
-
-        existing_habit.name = data.name if data.name else existing_habit.name
-        existing_habit.description = (
-            data.description
-            if data.description
-            else existing_habit.description
-        )
+        version = data.version
+        if version is None and if_match:
+            version = HabitService._parse_if_match(if_match)
+
+        values = {}
+        if data.name:
+            values['name'] = data.name
+        if data.description:
+            values['description'] = data.description
+        query = HabitService._scoped(update(Habit).where(Habit.id == id), user)
+        if version is not None:
+            query = query.where(Habit.version == version)
 
         if data.frequency:
-            get_days = await db.scalars(
-                select(Day).where(Day.id.in_(data.frequency))
+            values['frequency_mask'] = week_days_to_mask(data.frequency)
+            # Streaks depend on which days were scheduled, so they are
+            # rebuilt against the new schedule by the same UPDATE.
+            stats = StreakService.stats([id], values['frequency_mask'])
+            query = query.where(Habit.id == stats.c.id)
+            values.update(StreakService.stats_values(stats))
+
+        try:
+            result = await db.execute(
+                query
+                .values(
+                    **values,
+                    version=Habit.version + 1,
+                    updated_at=func.now(),
+                )
+                .returning(Habit)
+                .add_cte(HabitService._bump_owner(id)),
+                # The session can't synchronize an UPDATE ... FROM, so the
+                # returned rows refresh any loaded habit instead.
+                execution_options={
+                    'synchronize_session': False,
+                    'populate_existing': True,
+                },
+            )
+            existing_habit = result.scalar()
+        except IntegrityError as exc:
+            await HabitService._raise_duplicate(exc, db)
+
+        if not existing_habit:
+            # Scoped before the rollback expires the caller's attributes
+            lookup = HabitService._scoped(
+                select(Habit.id).where(Habit.id == id), user
             )
-            days = get_days.all()
-            existing_habit.frequency = days
+            await db.rollback()
+            if version is not None and await db.scalar(lookup):
+                raise ConflictException(
+                    'This habit was modified by another request'
+                )
+            await HabitService._raise_missing(id, db)
 
-        db.add(existing_habit)
         await db.commit()
-        await db.refresh(existing_habit)
 
-        return HabitReturn(
-            id=existing_habit.id,
-            name=existing_habit.name,
-            description=existing_habit.description,
-            frequency=[day.name for day in existing_habit.frequency],
+        habit = HabitService._to_return(existing_habit)
+        HabitService._refresh_today(
+            existing_habit.user_id, habit, existing_habit.frequency_mask
         )
+        completed_cache.invalidate(existing_habit.user_id)
+        return habit
 
     @staticmethod
     async def get_habits_completed_by_day(
-        date: date, user: User, db: AsyncSession
+        date: date, user: Principal, db: AsyncSession
     ) -> list[HabitReturn]:
+        if is_past(date):
+            cached = recall_completed(user.id, user.data_version, date)
+            if cached is not None:
+                return cached
+
         get_habits_completed = await db.scalars(
             select(Habit, HabitConclusion)
-            .options(selectinload(Habit.frequency))
             .join(Habit, Habit.id == HabitConclusion.habit_id)
             .where(
-                text('date(habits_conclusion.created_at) = date(:date)'),
+                HabitConclusion.conclusion_date == date,
                 Habit.user_id == user.id,
             )
-            .params(date=date)
         )
 
         habits_completed = get_habits_completed.all()
 
         formated_habits = [
-            HabitReturn(
-                id=habit.id,
-                name=habit.name,
-                description=habit.description,
-                frequency=[day.name for day in habit.frequency],
-            )
-            for habit in habits_completed
+            HabitService._to_return(habit) for habit in habits_completed
         ]
 
+        if is_past(date):
+            remember_completed(
+                user.id, user.data_version, date, formated_habits
+            )
+
         return formated_habits
 
+    @staticmethod
+    async def get_habit_history(
+        id: int, query: HabitHistoryQuery, user: User, db: AsyncSession
+    ) -> HabitHistoryReturn:
+        end = query.end or date.today()
+        # A year back by default, today included
+        start = query.start or end - timedelta(days=364)
+        if start > end:
+            raise BadRequestException('Invalid date range')
+        if (end - start).days >= MAX_HISTORY_DAYS:
+            raise BadRequestException('Date range too long')
+
+        # One row per year in range; the outer join still returns the habit
+        # when it has no history, which tells it apart from a missing one.
+        rows = await db.execute(
+            HabitService._scoped(
+                select(Habit.id, HabitHistory.year, HabitHistory.bits)
+                .outerjoin(
+                    HabitHistory,
+                    (HabitHistory.habit_id == Habit.id)
+                    & HabitHistory.year.between(start.year, end.year),
+                )
+                .where(Habit.id == id),
+                user,
+            )
+        )
+        years = rows.all()
+        if not years:
+            await HabitService._raise_missing(id, db)
+
+        return HabitHistoryService.to_return(
+            id,
+            {row.year: row.bits for row in years if row.year},
+            query.model_copy(update={'start': start, 'end': end}),
+        )
+
     @staticmethod
     async def get_upcoming_habits(
-        user: User, db: AsyncSession
+        user: Principal, db: AsyncSession
     ) -> list[HabitReturn]:
-        week_day = (datetime.now().weekday() + 1) % 7 + 1
-        get_upcoming_habits = await db.scalars(
-            select(Habit)
-            .options(selectinload(Habit.frequency))
+        view = get_today_view(user.id)
+        if view is not None:
+            return view.upcoming()
+
+        result = await db.execute(
+            select(Habit, HabitConclusion.id.is_not(None).label('done'))
             .outerjoin(
                 HabitConclusion,
                 (HabitConclusion.habit_id == Habit.id)
-                & (func.date(HabitConclusion.created_at) == func.date('now')),
+                & (HabitConclusion.conclusion_date == func.current_date()),
             )
-            .join(Habit.frequency)
             .where(
                 Habit.user_id == user.id,
-                HabitConclusion.id.is_(None),
-                Day.id == week_day,
+                Habit.frequency_mask.op('&')(week_day_bit(today_week_day()))
+                != 0,
             )
         )
 
-        upcoming_habits = get_upcoming_habits.all()
+        view = TodayView(day=date.today(), habits={})
+        for habit, done in result:
+            view.habits[habit.id] = HabitService._to_return(habit)
+            if done:
+                view.done.add(habit.id)
 
-        formated_habits = [
-            HabitReturn(
-                id=habit.id,
-                name=habit.name,
-                description=habit.description,
-                frequency=[day.name for day in habit.frequency],
+        today_cache.set(user.id, view)
+        return view.upcoming()
+
+    @staticmethod
+    def _change_key(row: Habit | HabitConclusion | HabitTombstone):
+        return row.change_xid, row.change_seq
+
+    @staticmethod
+    async def get_changes(
+        user: Principal,
+        db: AsyncSession,
+        since: Optional[str] = None,
+        limit: int = 500,
+    ) -> tuple[HabitChanges, str]:
+        # Rows are paged in (change_xid, change_seq) order, and only those
+        # written by transactions older than every one still running, so
+        # a late commit can never land behind a cursor already handed out.
+        horizon = await db.scalar(select(snapshot_xmin))
+
+        position, deleted_from = (0, 0), horizon
+        if since:
+            position = (
+                decode_int_cursor(since, 'xid'),
+                decode_int_cursor(since, 'seq'),
+            )
+            # A full sync starts from an empty client, so only deletions
+            # made while it is being paged apply
+            deleted_from = decode_cursor(since).get('from', 0)
+            if not isinstance(deleted_from, int):
+                raise BadRequestException('Invalid cursor')
+
+        def window(model):
+            return (
+                tuple_(model.change_xid, model.change_seq) > tuple_(*position),
+                model.change_xid < horizon,
             )
-            for habit in upcoming_habits
-        ]
 
-        return formated_habits
+        habits = await db.scalars(
+            select(Habit)
+            .where(Habit.user_id == user.id, *window(Habit))
+            .order_by(Habit.change_xid, Habit.change_seq)
+            .limit(limit + 1)
+            # Streak counters are written by Core statements the session
+            # doesn't track
+            .execution_options(populate_existing=True)
+        )
+        conclusions = await db.scalars(
+            select(HabitConclusion)
+            .join(Habit, Habit.id == HabitConclusion.habit_id)
+            .where(Habit.user_id == user.id, *window(HabitConclusion))
+            .order_by(HabitConclusion.change_xid, HabitConclusion.change_seq)
+            .limit(limit + 1)
+        )
+        tombstones = await db.scalars(
+            select(HabitTombstone)
+            .where(
+                HabitTombstone.user_id == user.id,
+                HabitTombstone.change_xid >= deleted_from,
+                *window(HabitTombstone),
+            )
+            .order_by(HabitTombstone.change_xid, HabitTombstone.change_seq)
+            .limit(limit + 1)
+        )
+        changed_habits = habits.all()
+        changed_conclusions = conclusions.all()
+        deleted = tombstones.all()
+
+        rows = sorted(
+            [*changed_habits, *changed_conclusions, *deleted],
+            key=HabitService._change_key,
+        )
+        has_more = len(rows) > limit
+        if rows:
+            position = HabitService._change_key(rows[:limit][-1])
+
+        def in_page(rows):
+            return [
+                row
+                for row in rows
+                if HabitService._change_key(row) <= position
+            ]
+
+        changes = HabitChanges(
+            habits=[
+                HabitService._to_return(habit)
+                for habit in in_page(changed_habits)
+            ],
+            conclusions=[
+                HabitConclusionChange.model_validate(conclusion)
+                for conclusion in in_page(changed_conclusions)
+            ],
+            deleted=[
+                HabitTombstoneReturn(
+                    entity=tombstone.entity, id=tombstone.entity_id
+                )
+                for tombstone in in_page(deleted)
+            ],
+            has_more=has_more,
+        )
+
+        cursor = {'xid': position[0], 'seq': position[1]}
+        if has_more and deleted_from:
+            cursor['from'] = deleted_from
+        return changes, encode_cursor(cursor)
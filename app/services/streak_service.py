@@ -0,0 +1,245 @@
+from datetime import date
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Subquery,
+    Update,
+    case,
+    extract,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.habit import Habit
+from app.models.habit_conclution import HabitConclusion
+from app.models.user import User
+from app.services.user_service import UserService
+from app.utils.week_days import WEEK_DAYS, missed_scheduled_day
+
+
+class StreakService:
+    @staticmethod
+    def _missed_between(
+        previous: ColumnElement[date],
+        day: ColumnElement[date],
+        mask: ColumnElement[int],
+    ) -> ColumnElement[bool]:
+        # SQL twin of missed_scheduled_day: the gap's weekdays become a run
+        # of bits starting after `previous`, folded back into the 7-bit mask.
+        week = len(WEEK_DAYS)
+        # Postgres binds `-` tighter than `<<`, hence the explicit grouping
+        gap = (type_coerce(day - previous, Integer) - 1).self_group()
+        start = (extract('dow', previous).cast(Integer) + 1) % week
+        run = (literal(1).op('<<')(gap) - 1).op('<<')(start)
+        folded = run.op('|')(run.op('>>')(week)).op('&')(2**week - 1)
+        return case(
+            (gap <= 0, false()),
+            (gap >= week, mask != 0),
+            else_=folded.op('&')(mask) != 0,
+        )
+
+    @staticmethod
+    def marked_today() -> dict[str, Any]:
+        # Counter values for a habit concluded today, computed from the
+        # stored ones so marking never reads the habit's history.
+        last = Habit.last_completed_at
+        today = func.current_date()
+        streak = case(
+            (last.is_(None), 1),
+            (
+                StreakService._missed_between(
+                    last, today, Habit.frequency_mask
+                ),
+                1,
+            ),
+            else_=Habit.current_streak + 1,
+        )
+        return {
+            'current_streak': streak,
+            'longest_streak': func.greatest(Habit.longest_streak, streak),
+            'total_completions': Habit.total_completions + 1,
+            'last_completed_at': today,
+            'updated_at': Habit.updated_at,
+        }
+
+    @staticmethod
+    def stats(
+        habit_ids: Optional[Iterable[int]] = None,
+        frequency_mask: Optional[int] = None,
+    ) -> Subquery:
+        conclusions = select(
+            HabitConclusion.habit_id,
+            HabitConclusion.conclusion_date.label('day'),
+            func
+            .lag(HabitConclusion.conclusion_date)
+            .over(
+                partition_by=HabitConclusion.habit_id,
+                order_by=HabitConclusion.conclusion_date,
+            )
+            .label('previous'),
+        )
+        if habit_ids is not None:
+            conclusions = conclusions.where(
+                HabitConclusion.habit_id.in_(habit_ids)
+            )
+        ordered = conclusions.subquery()
+
+        # A schedule about to be saved can be passed in as frequency_mask
+        mask = Habit.frequency_mask
+        if frequency_mask is not None:
+            mask = literal(frequency_mask)
+
+        # Every conclusion that follows a missed scheduled day starts a new
+        # run; the running sum of those breaks numbers the runs.
+        breaks = (
+            select(
+                ordered.c.habit_id,
+                ordered.c.day,
+                case(
+                    (ordered.c.previous.is_(None), 1),
+                    (
+                        StreakService._missed_between(
+                            ordered.c.previous, ordered.c.day, mask
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                ).label('starts_run'),
+            )
+            .join(Habit, Habit.id == ordered.c.habit_id)
+            .subquery()
+        )
+        numbered = select(
+            breaks.c.habit_id,
+            breaks.c.day,
+            func
+            .sum(breaks.c.starts_run)
+            .over(partition_by=breaks.c.habit_id, order_by=breaks.c.day)
+            .label('run'),
+        ).subquery()
+        runs = (
+            select(
+                numbered.c.habit_id,
+                func.count().label('length'),
+                func.max(numbered.c.day).label('last_day'),
+            )
+            .group_by(numbered.c.habit_id, numbered.c.run)
+            .subquery()
+        )
+        totals = (
+            select(
+                runs.c.habit_id,
+                array_agg(
+                    aggregate_order_by(runs.c.length, runs.c.last_day.desc())
+                )[1].label('current_streak'),
+                func.max(runs.c.length).label('longest_streak'),
+                func.sum(runs.c.length).label('total_completions'),
+                func.max(runs.c.last_day).label('last_completed_at'),
+            )
+            .group_by(runs.c.habit_id)
+            .subquery()
+        )
+
+        # Habits left without conclusions are reset through the outer join
+        target = aliased(Habit)
+        stats = select(
+            target.id,
+            func.coalesce(totals.c.current_streak, 0).label('current_streak'),
+            func.coalesce(totals.c.longest_streak, 0).label('longest_streak'),
+            func.coalesce(totals.c.total_completions, 0).label(
+                'total_completions'
+            ),
+            totals.c.last_completed_at,
+        ).outerjoin(totals, totals.c.habit_id == target.id)
+        if habit_ids is not None:
+            stats = stats.where(target.id.in_(habit_ids))
+        return stats.subquery()
+
+    @staticmethod
+    def stats_values(stats: Subquery) -> dict[str, Any]:
+        return {
+            'current_streak': stats.c.current_streak,
+            'longest_streak': stats.c.longest_streak,
+            'total_completions': stats.c.total_completions,
+            'last_completed_at': stats.c.last_completed_at,
+        }
+
+    @staticmethod
+    def rebuild(
+        habit_ids: Optional[Iterable[int]] = None, drifted_only: bool = False
+    ) -> Update:
+        stats = StreakService.stats(habit_ids)
+        values = StreakService.stats_values(stats)
+        query = update(Habit).where(Habit.id == stats.c.id)
+        if drifted_only:
+            query = query.where(
+                or_(
+                    *(
+                        getattr(Habit, name).is_distinct_from(value)
+                        for name, value in values.items()
+                    )
+                )
+            )
+        return query.values(**values, updated_at=Habit.updated_at)
+
+    @staticmethod
+    async def rebuild_all(db: AsyncSession, batch_size: int = 1000) -> int:
+        # Walks the habits in id order, committing each slice so the repair
+        # never holds locks on every habit at once.
+        rebuilt, last_id = 0, 0
+        while True:
+            rows = await db.scalars(
+                select(Habit.id)
+                .where(Habit.id > last_id)
+                .order_by(Habit.id)
+                .limit(batch_size)
+            )
+            habit_ids = rows.all()
+            if not habit_ids:
+                return rebuilt
+
+            # Only habits whose counters drifted are rewritten, and their
+            # owners' data_version moves in the same statement so cached
+            # responses don't outlive the repair.
+            rebuilt_rows = (
+                StreakService
+                .rebuild(habit_ids, drifted_only=True)
+                .returning(Habit.user_id)
+                .cte('rebuilt')
+            )
+            bumped = (
+                UserService
+                .data_version_bump(rebuilt_rows.c.user_id)
+                .returning(User.id)
+                .cte('bumped')
+            )
+            rebuilt += await db.scalar(
+                select(func.count()).select_from(rebuilt_rows).add_cte(bumped)
+            )
+            await db.commit()
+            last_id = habit_ids[-1]
+
+    @staticmethod
+    def current_streak(
+        streak: int,
+        last_completed_at: Optional[date],
+        frequency_mask: int,
+        today: date,
+    ) -> int:
+        # The stored streak ends at the last conclusion; it only still
+        # counts if no scheduled day has been skipped since.
+        if last_completed_at is None or missed_scheduled_day(
+            frequency_mask, last_completed_at, today
+        ):
+            return 0
+        return streak
@@ -1,6 +1,8 @@
 from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from sqlalchemy import select
+from sqlalchemy import Select, Update, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.exceptions.api_exception import (
@@ -9,91 +11,151 @@ from app.exceptions.api_exception import (
 from app.models.user import User
 from app.schemas.user_schema import (
     UserCreate,
+    UserDirectoryFilter,
+    UserDirectoryPage,
     UserOutFull,
     UserUpdate,
 )
-from app.utils.security import bcrypt_context
+from app.utils.database import violated_constraint
+from app.utils.pagination import decode_id_cursor, encode_cursor
+from app.utils.security import password_hasher, user_cache
 
 
 class UserService:
     @staticmethod
-    async def create_user(data: UserCreate, db: Session) -> User:
-        get_user = await db.scalar(
-            select(User).where(User.email == data.email)
+    def data_version_bump(user_id) -> Update:
+        return (
+            update(User)
+            .where(User.id == user_id)
+            .values(data_version=User.data_version + 1)
         )
 
-        if get_user:
-            raise BadRequestException('Email already registered')
-
-        password_hash = bcrypt_context.hash(data.password)
-        user = User(
-            username=data.username,
-            email=data.email,
-            password=password_hash,
-            is_admin=data.is_admin,
-            is_active=data.is_active,
+    @staticmethod
+    async def _update_user(db: Session, user_id: int, **values) -> User:
+        user = await db.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                **values,
+                data_version=User.data_version + 1,
+                updated_at=datetime.now(),
+            )
+            .returning(User)
+            .execution_options(populate_existing=True)
         )
-
-        db.add(user)
         await db.commit()
-        await db.refresh(user)
+        user_cache.invalidate(user_id)
+        return user
+
+    @staticmethod
+    async def create_user(data: UserCreate, db: Session) -> User:
+        password_hash = await password_hasher.hash(data.password)
+
+        try:
+            user = await db.scalar(
+                insert(User)
+                .values(
+                    username=data.username,
+                    email=data.email,
+                    password=password_hash,
+                    is_admin=data.is_admin,
+                    is_active=data.is_active,
+                )
+                .returning(User)
+            )
+            await db.commit()
+        except IntegrityError as exc:
+            await db.rollback()
+            if violated_constraint(exc) == 'ix_users_email':
+                raise BadRequestException('Email already registered') from exc
+            raise
+
         return user
 
     @staticmethod
     async def update_user(user: User, data: UserUpdate, db: Session) -> User:
+        values = {}
 
-        user.username = data.username if data.username else user.username
+        if data.username:
+            values['username'] = data.username
 
         if data.password and not data.oldpassword:
             raise BadRequestException('Old password required')
-        elif data.password and not bcrypt_context.verify(
+        elif data.password and not await password_hasher.verify(
             data.oldpassword, user.password
         ):
             raise BadRequestException('Old password not math')
 
-        user.password = (
-            bcrypt_context.hash(data.password)
-            if data.password
-            else user.password
-        )
-        user.updated_at = datetime.now()
+        if data.password:
+            values['password'] = await password_hasher.hash(data.password)
 
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        return user
+        return await UserService._update_user(db, user.id, **values)
 
     @staticmethod
     async def deactivate_user(user: User, db: Session) -> User:
         if not user.is_active:
             raise BadRequestException('User alreary deactivate')
 
-        user.is_active = False
-        user.updated_at = datetime.now()
-
-        await db.commit()
-        await db.refresh(user)
-        return user
+        return await UserService._update_user(db, user.id, is_active=False)
 
     @staticmethod
     async def activate_user(user: User, db: Session) -> User:
         if user.is_active:
             raise BadRequestException('User alreary activated')
 
-        user.is_active = True
-        user.updated_at = datetime.now()
-
-        await db.commit()
-        await db.refresh(user)
-        return user
+        return await UserService._update_user(db, user.id, is_active=True)
 
     # Administrative Services
 
     @staticmethod
-    async def get_all_users(db: Session) -> list[UserOutFull]:
-        result = await db.scalars(select(User))
+    def _directory_query(filters: UserDirectoryFilter) -> Select:
+        query = select(
+            User.id, User.username, User.email, User.is_admin, User.is_active
+        ).order_by(User.id)
+
+        if filters.is_active is not None:
+            query = query.where(User.is_active == filters.is_active)
+
+        if filters.is_admin is not None:
+            query = query.where(User.is_admin == filters.is_admin)
+
+        if filters.q:
+            # Built in Python so the planner sees a constant prefix and can
+            # use the lower(...) text_pattern_ops indexes.
+            pattern = (
+                filters.q
+                .lower()
+                .replace('\\', '\\\\')
+                .replace('%', '\\%')
+                .replace('_', '\\_')
+                + '%'
+            )
+            query = query.where(
+                or_(
+                    func.lower(User.email).like(pattern),
+                    func.lower(User.username).like(pattern),
+                )
+            )
+
+        return query
+
+    @staticmethod
+    async def get_all_users(
+        db: Session, page: UserDirectoryPage
+    ) -> tuple[list[UserOutFull], Optional[str]]:
+        query = UserService._directory_query(page)
+
+        if page.cursor:
+            query = query.where(User.id > decode_id_cursor(page.cursor))
+
+        result = await db.execute(query.limit(page.limit + 1))
         all_users = result.all()
 
+        next_cursor = None
+        if len(all_users) > page.limit:
+            all_users = all_users[: page.limit]
+            next_cursor = encode_cursor({'id': all_users[-1].id})
+
         formated_users = [
             UserOutFull(
                 id=user.id,
@@ -105,4 +167,20 @@ class UserService:
             for user in all_users
         ]
 
-        return formated_users
+        return formated_users, next_cursor
+
+    @staticmethod
+    async def export_users(
+        db: Session, filters: UserDirectoryFilter
+    ) -> AsyncIterator[str]:
+        query = UserService._directory_query(filters)
+
+        # stream() runs on a server-side cursor, so only one partition of
+        # rows is held in memory at a time.
+        result = await db.stream(query.execution_options(yield_per=1000))
+
+        async for partition in result.partitions():
+            yield ''.join(
+                UserOutFull.model_validate(user).model_dump_json() + '\n'
+                for user in partition
+            )
@@ -0,0 +1,63 @@
+import os
+from datetime import date
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.schemas.habit_schema import HabitReturn
+from app.utils.cache import TTLCache
+
+load_dotenv()
+
+COMPLETED_CACHE_MAX_SIZE = int(os.getenv('COMPLETED_CACHE_MAX_SIZE', '10000'))
+COMPLETED_CACHE_TTL_SECONDS = float(
+    os.getenv('COMPLETED_CACHE_TTL_SECONDS', '3600')
+)
+COMPLETED_CACHE_DATES_PER_USER = 400
+
+# Completed habits for past dates, grouped per user and stamped with the
+# data_version they were read at. Writes from other workers only move the
+# version in the database, so an entry is reused only while it matches.
+completed_cache: TTLCache[int, tuple[int, dict[date, list[HabitReturn]]]] = (
+    TTLCache(
+        max_size=COMPLETED_CACHE_MAX_SIZE, ttl=COMPLETED_CACHE_TTL_SECONDS
+    )
+)
+
+
+def recall_completed(
+    user_id: int, data_version: int, day: date
+) -> Optional[list[HabitReturn]]:
+    entry = completed_cache.get(user_id)
+    if entry is None:
+        return None
+
+    version, history = entry
+    if version != data_version or day not in history:
+        return None
+
+    # Re-inserted so the per-user cap evicts the least recently read date
+    habits = history[day] = history.pop(day)
+    return habits
+
+
+def remember_completed(
+    user_id: int, data_version: int, day: date, habits: list[HabitReturn]
+):
+    entry = completed_cache.get(user_id)
+    if entry is not None and entry[0] > data_version:
+        # Read before a write another request has already cached past
+        return
+    if entry is None or entry[0] != data_version:
+        entry = (data_version, {})
+        completed_cache.set(user_id, entry)
+
+    history = entry[1]
+
+    history[day] = habits
+    if len(history) > COMPLETED_CACHE_DATES_PER_USER:
+        del history[next(iter(history))]
+
+
+def is_past(day: date) -> bool:
+    return day < date.today()
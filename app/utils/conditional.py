@@ -0,0 +1,117 @@
+import hashlib
+from dataclasses import replace
+from datetime import date
+from typing import Optional
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions.api_exception import (
+    NotModifiedException,
+    UnauthorizedException,
+)
+from app.models.user import User
+from app.utils.database import get_db
+from app.utils.security import (
+    Principal,
+    check_active,
+    verify_token,
+    verify_token_claims,
+)
+
+
+def make_etag(*parts) -> str:
+    raw = '|'.join(str(part) for part in parts).encode()
+    return f'"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+def check_etag(request: Request, response: Response, etag: str):
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        raise NotModifiedException(etag)
+
+    response.headers['ETag'] = etag
+
+
+# The version leads the tag so it can go back as If-Match. change_seq
+# follows the streak counters, which change without a new version, and the
+# day, since a stored streak lapses at midnight.
+def habit_etag(version: int, change_seq: int) -> str:
+    digest = make_etag(change_seq, date.today())[1:-1]
+    return f'"{version}.{digest}"'
+
+
+# The tag covers the route, its query string and the day, since lists such
+# as /habit/upcoming change at midnight without any write.
+def _data_etag(request: Request, user_id: int, data_version: int) -> str:
+    return make_etag(
+        user_id,
+        data_version,
+        date.today(),
+        request.url.path,
+        request.url.query,
+    )
+
+
+async def check_data_version(
+    request: Request,
+    response: Response,
+    user: Principal = Depends(verify_token_claims),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    result = await db.execute(
+        select(User.data_version, User.is_active).where(User.id == user.id)
+    )
+    row = result.first()
+    if not row:
+        raise UnauthorizedException()
+    check_active(row)
+
+    check_etag(
+        request, response, _data_etag(request, user.id, row.data_version)
+    )
+    return replace(user, data_version=row.data_version)
+
+
+async def check_fresh_user_version(
+    request: Request,
+    response: Response,
+    user: Principal = Depends(verify_token_claims),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    # Read from the database rather than user_cache, so the body can't lag
+    # behind the data_version its ETag is built from.
+    fresh_user = await db.scalar(
+        select(User)
+        .where(User.id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    if not fresh_user:
+        raise UnauthorizedException()
+    check_active(fresh_user)
+
+    check_etag(
+        request,
+        response,
+        _data_etag(request, fresh_user.id, fresh_user.data_version),
+    )
+    return fresh_user
+
+
+def check_user_version(
+    request: Request,
+    response: Response,
+    user: User = Depends(verify_token),
+) -> User:
+    check_etag(
+        request, response, _data_etag(request, user.id, user.data_version)
+    )
+    return user
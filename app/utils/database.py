@@ -1,6 +1,8 @@
 import os
+from typing import Optional
 
 from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -11,7 +13,7 @@ SQLALCHEMY_DATABASE_URL = os.getenv('SQLALCHEMY_DATABASE_URL')
 engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = async_sessionmaker(
-    autocommit=False, autoflush=False, bind=engine
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
 
 
@@ -22,3 +24,8 @@ class Base(DeclarativeBase):
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+
+def violated_constraint(exc: IntegrityError) -> Optional[str]:
+    diag = getattr(exc.orig, 'diag', None)
+    return getattr(diag, 'constraint_name', None)
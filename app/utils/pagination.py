@@ -0,0 +1,36 @@
+import base64
+import binascii
+import json
+
+from app.exceptions.api_exception import BadRequestException
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequestException('Invalid cursor')
+
+    if not isinstance(values, dict):
+        raise BadRequestException('Invalid cursor')
+
+    return values
+
+
+def decode_int_cursor(cursor: str, key: str) -> int:
+    value = decode_cursor(cursor).get(key)
+
+    if not isinstance(value, int):
+        raise BadRequestException('Invalid cursor')
+
+    return value
+
+
+def decode_id_cursor(cursor: str) -> int:
+    return decode_int_cursor(cursor, 'id')
@@ -1,16 +1,29 @@
+import asyncio
 import os
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from dotenv import load_dotenv
 from fastapi.params import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from app.exceptions.api_exception import UnauthorizedException
+from app.exceptions.api_exception import (
+    ServiceUnavailableException,
+    UnauthorizedException,
+)
 from app.models.user import User
+from app.utils.cache import TTLCache
 from app.utils.database import get_db
 
 load_dotenv()
@@ -18,20 +31,137 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
+PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', '32'))
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', '10000'))
+USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '60'))
 
 
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2 = OAuth2PasswordBearer(tokenUrl='auth/login')
 
 
+def _hash_password(password: str) -> str:
+    return bcrypt_context.hash(password)
+
+
+def _verify_password(password: str, password_hash: str) -> bool:
+    return bcrypt_context.verify(password, password_hash)
+
+
+def _timed(func, *args):
+    # Runs inside the worker; time.monotonic is system wide on Linux, so the
+    # timestamps are comparable with the event loop even for process pools.
+    started_at = time.monotonic()
+    result = func(*args)
+    return result, started_at, time.monotonic()
+
+
+@dataclass
+class PasswordHashMetrics:
+    completed: int = 0
+    rejected: int = 0
+    in_flight: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    hash_time_total: float = 0.0
+    hash_time_max: float = 0.0
+
+    def record(self, queue_wait: float, hash_time: float):
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += hash_time
+        self.hash_time_max = max(self.hash_time_max, hash_time)
+
+    def snapshot(self) -> dict:
+        return asdict(self)
+
+
+# Runs bcrypt off the event loop. Jobs beyond workers + max_queue are rejected
+# with a 503 instead of piling up behind the pool.
+class PasswordHasher:
+    def __init__(
+        self,
+        executor: str = 'thread',
+        workers: int = 4,
+        max_queue: int = 32,
+    ):
+        if executor not in {'thread', 'process'}:
+            raise ValueError(f'Invalid password hash executor: {executor}')
+
+        self.executor = executor
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.metrics = PasswordHashMetrics()
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hash',
+                )
+        return self._pool
+
+    async def _run(self, func, *args):
+        if self.metrics.in_flight >= self.max_pending:
+            self.metrics.rejected += 1
+            raise ServiceUnavailableException(
+                'Too many authentication requests, try again later.'
+            )
+
+        self.metrics.in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, finished_at = await loop.run_in_executor(
+                self._get_pool(), _timed, func, *args
+            )
+        finally:
+            self.metrics.in_flight -= 1
+
+        self.metrics.record(
+            started_at - submitted_at, finished_at - started_at
+        )
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(_verify_password, password, password_hash)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    executor=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+)
+
+
 class AuthLogin:
     def generate_token(
         user_id: int,
         duration: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        is_admin: bool = False,
     ) -> str:
         expiration_date = datetime.now(timezone.utc) + duration
 
-        information_token = {'sub': str(user_id), 'exp': expiration_date}
+        information_token = {
+            'sub': str(user_id),
+            'adm': is_admin,
+            'exp': expiration_date,
+        }
 
         jwt_token = jwt.encode(
             information_token, SECRET_KEY, algorithm=ALGORITHM
@@ -39,21 +169,97 @@ class AuthLogin:
         return jwt_token
 
 
-async def verify_token(
-    token: str = Depends(oauth2), db: Session = Depends(get_db)
-):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-        user_id: int = int(payload.get('sub'))
-        user = await db.scalar(select(User).where(User.id == user_id))
+# Authenticated users keyed by id. Writes to a user invalidate its entry, so
+# other workers see the change at most USER_CACHE_TTL_SECONDS later.
+user_cache: TTLCache[int, User] = TTLCache(
+    max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS
+)
+
+
+def _detached_copy(user: User) -> User:
+    copy = User(
+        username=user.username,
+        email=user.email,
+        password=user.password,
+        is_active=user.is_active,
+        is_admin=user.is_admin,
+    )
+    copy.id = user.id
+    copy.data_version = user.data_version
+    copy.updated_at = user.updated_at
+    copy.created_at = user.created_at
+    make_transient_to_detached(copy)
+    return copy
 
-        return user
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    is_admin: bool
+    expires_at: datetime
+    # Set by check_data_version from the row it checks the ETag against
+    data_version: Optional[int] = None
+
+
+def _decode_token(token: str) -> dict:
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
     except jwt.ExpiredSignatureError:
         raise UnauthorizedException('Token has expired')
     except JWTError:
         raise UnauthorizedException('Invalid Token')
 
 
+def verify_token_claims(token: str = Depends(oauth2)) -> Principal:
+    payload = _decode_token(token)
+
+    return Principal(
+        id=int(payload.get('sub')),
+        is_admin=bool(payload.get('adm', False)),
+        expires_at=datetime.fromtimestamp(payload['exp'], tz=timezone.utc),
+    )
+
+
+async def _resolve_user(token: str, db: Session) -> Optional[User]:
+    user_id: int = int(_decode_token(token).get('sub'))
+
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        # The cached copy is never attached to a session; merge hands this
+        # request its own instance without querying the database.
+        return await db.merge(cached_user, load=False)
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+
+    if user:
+        user_cache.set(user_id, _detached_copy(user))
+
+    return user
+
+
+def check_active(user: User | Row):
+    if not user.is_active:
+        raise UnauthorizedException('User is deactivated')
+
+
+async def verify_token(
+    token: str = Depends(oauth2), db: Session = Depends(get_db)
+):
+    user = await _resolve_user(token, db)
+
+    if user:
+        check_active(user)
+
+    return user
+
+
+async def verify_token_allow_inactive(
+    token: str = Depends(oauth2), db: Session = Depends(get_db)
+):
+    # Only for reactivation, the one thing a deactivated user can still do
+    return await _resolve_user(token, db)
+
+
 def verify_admin(user: User = Depends(verify_token)):
     if not user.is_admin:
         raise UnauthorizedException()
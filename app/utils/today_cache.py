@@ -0,0 +1,46 @@
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.schemas.habit_schema import HabitReturn
+from app.utils.cache import TTLCache
+
+load_dotenv()
+
+TODAY_CACHE_MAX_SIZE = int(os.getenv('TODAY_CACHE_MAX_SIZE', '10000'))
+TODAY_CACHE_TTL_SECONDS = float(os.getenv('TODAY_CACHE_TTL_SECONDS', '300'))
+
+
+@dataclass
+class TodayView:
+    day: date
+    habits: dict[int, HabitReturn]
+    done: set[int] = field(default_factory=set)
+
+    def upcoming(self) -> list[HabitReturn]:
+        return [
+            habit
+            for habit_id, habit in sorted(self.habits.items())
+            if habit_id not in self.done
+        ]
+
+
+# Habits scheduled for today per user, kept in step by the habit write
+# paths. Other workers catch up within TODAY_CACHE_TTL_SECONDS.
+today_cache: TTLCache[int, TodayView] = TTLCache(
+    max_size=TODAY_CACHE_MAX_SIZE, ttl=TODAY_CACHE_TTL_SECONDS
+)
+
+
+def get_today_view(user_id: int) -> Optional[TodayView]:
+    view = today_cache.get(user_id)
+
+    # Views built yesterday roll over on the first read of the new day
+    if view is not None and view.day != date.today():
+        today_cache.invalidate(user_id)
+        return None
+
+    return view
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.day import Day
+
+# Mirrors the rows seeded in the `days` table, keyed by id (1 = Sunday).
+WEEK_DAYS = MappingProxyType({
+    1: 'Domingo',
+    2: 'Segunda',
+    3: 'Terça',
+    4: 'Quarta',
+    5: 'Quinta',
+    6: 'Sexta',
+    7: 'Sábado',
+})
+
+
+def week_day_of(day: date) -> int:
+    return (day.weekday() + 1) % 7 + 1
+
+
+def today_week_day() -> int:
+    return week_day_of(datetime.now().date())
+
+
+# Habit schedules are stored as a 7-bit mask: bit (day_id - 1) set means the
+# habit is due on that weekday.
+def week_day_bit(day_id: int) -> int:
+    return 1 << (day_id - 1)
+
+
+def week_days_to_mask(day_ids: Iterable[int]) -> int:
+    mask = 0
+    for day_id in day_ids:
+        if day_id in WEEK_DAYS:
+            mask |= week_day_bit(day_id)
+    return mask
+
+
+def mask_to_week_day_names(mask: int) -> list[str]:
+    return [
+        name
+        for day_id, name in WEEK_DAYS.items()
+        if mask & week_day_bit(day_id)
+    ]
+
+
+def missed_scheduled_day(mask: int, after: date, before: date) -> bool:
+    # Whether any day strictly between `after` and `before` was scheduled
+    gap = (before - after).days - 1
+    if gap >= len(WEEK_DAYS):
+        return mask != 0
+    return any(
+        mask & week_day_bit(week_day_of(after + timedelta(days=offset)))
+        for offset in range(1, gap + 1)
+    )
+
+
+async def check_week_days(db: AsyncSession):
+    rows = await db.execute(select(Day.id, Day.name))
+    stored = dict(rows.tuples().all())
+
+    if stored != dict(WEEK_DAYS):
+        raise RuntimeError(
+            f'The days table does not match the weekday catalog: {stored}'
+        )
@@ -4,7 +4,7 @@ from datetime import datetime
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import event, select
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -18,8 +18,22 @@ from app.models.day import Day
 from app.models.habit import Habit
 from app.schemas.authenticate_schema import LoginReturn
 from app.schemas.response import BaseResponse
+from app.utils.completed_cache import completed_cache
 from app.utils.database import Base, get_db
-from app.utils.security import bcrypt_context
+from app.utils.security import bcrypt_context, user_cache
+from app.utils.today_cache import today_cache
+from app.utils.week_days import week_days_to_mask
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    user_cache.clear()
+    today_cache.clear()
+    completed_cache.clear()
+    yield
+    user_cache.clear()
+    today_cache.clear()
+    completed_cache.clear()
 
 
 @pytest_asyncio.fixture
@@ -88,6 +102,46 @@ def mock_db_time():
     return _mock_db_time
 
 
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+        self.parameters: list = []
+        self.rows = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(engine: AsyncEngine):
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+
+        def before_execute(conn, cursor, statement, parameters, *args):
+            counter.statements.append(statement)
+            counter.parameters.append(parameters)
+
+        def after_execute(conn, cursor, statement, *args):
+            if cursor.description is not None:
+                counter.rows += max(cursor.rowcount, 0)
+
+        event.listen(
+            engine.sync_engine, 'before_cursor_execute', before_execute
+        )
+        event.listen(engine.sync_engine, 'after_cursor_execute', after_execute)
+
+        yield counter
+
+        event.remove(
+            engine.sync_engine, 'before_cursor_execute', before_execute
+        )
+        event.remove(engine.sync_engine, 'after_cursor_execute', after_execute)
+
+    return _count_queries
+
+
 @pytest_asyncio.fixture
 async def user(
     request,
@@ -156,12 +210,11 @@ async def token(client, user):
 
 @pytest_asyncio.fixture
 async def habit(session: AsyncSession, user):
-
-    get_days = await session.scalars(select(Day).where(Day.id.in_([1])))
-    days = get_days.all()
-
     habit: Habit = Habit(
-        name='Test', description='Test', frequency=days, user_id=user.id
+        name='Test',
+        description='Test',
+        frequency_mask=week_days_to_mask([1]),
+        user_id=user.id,
     )
 
     session.add(habit)
@@ -173,13 +226,10 @@ async def habit(session: AsyncSession, user):
 
 @pytest_asyncio.fixture
 async def habit_another_user(session: AsyncSession, another_user):
-    get_days = await session.scalars(select(Day).where(Day.id.in_([1])))
-    days = get_days.all()
-
     habit: Habit = Habit(
         name='Test',
         description='Test',
-        frequency=days,
+        frequency_mask=week_days_to_mask([1]),
         user_id=another_user.id,
     )
 
@@ -6,6 +6,7 @@ from freezegun import freeze_time
 from app.schemas.authenticate_schema import LoginReturn
 from app.schemas.response import BaseResponse
 from app.schemas.token_schema import RefreshTokenResponse
+from app.utils.security import password_hasher
 
 
 @pytest.mark.asyncio
@@ -53,6 +54,25 @@ async def test_login_with_wrong_password(client, user):
     assert response_schema.message == 'Invalid email or password'
 
 
+@pytest.mark.asyncio
+async def test_login_with_password_hasher_saturated(client, user, monkeypatch):
+    monkeypatch.setattr(password_hasher, 'max_pending', 0)
+
+    response = await client.post(
+        '/auth/login',
+        json={'email': user.email, 'password': user.clean_password},
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response_schema.status == 'error'
+    assert (
+        response_schema.message
+        == 'Too many authentication requests, try again later.'
+    )
+
+
 @pytest.mark.asyncio
 async def test_login_without_information(client, user):
     response = await client.post(
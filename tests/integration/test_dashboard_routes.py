@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import update
+
+from app.models.habit import Habit
+from app.models.user import User
+from app.schemas.dashboard_schema import DashboardOut
+from app.schemas.response import BaseResponse
+from app.utils.week_days import week_day_of, week_days_to_mask
+
+
+@pytest.mark.asyncio
+async def test_get_dashboard(client, session, token, user, count_queries):
+    daily = Habit(
+        name='Daily',
+        description='',
+        frequency_mask=week_days_to_mask(range(1, 8)),
+        user_id=user.id,
+    )
+    tomorrow = Habit(
+        name='Tomorrow',
+        description='',
+        frequency_mask=week_days_to_mask([
+            week_day_of(date.today() + timedelta(days=1))
+        ]),
+        user_id=user.id,
+    )
+    session.add_all([daily, tomorrow])
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    await client.post(f'/habit/mark-done/{daily.id}', headers=headers)
+    await client.get('/user/', headers=headers)
+
+    with count_queries() as counter:
+        response = await client.get('/dashboard', headers=headers)
+
+    with count_queries() as counter_upcoming:
+        response_upcoming = await client.get(
+            '/habit/upcoming', headers=headers
+        )
+
+    response_schema = BaseResponse[DashboardOut].model_validate(
+        response.json()
+    )
+    dashboard = response_schema.data
+
+    assert response.status_code == HTTPStatus.OK
+    assert response_schema.message == 'Dashboard returned successfully'
+    assert dashboard.user.id == user.id
+    assert dashboard.today == date.today()
+    assert [
+        (
+            habit.name,
+            habit.scheduled_today,
+            habit.done_today,
+            habit.total_completions,
+        )
+        for habit in dashboard.habits
+    ] == [('Daily', True, True, 1), ('Tomorrow', False, False, 0)]
+    # The data_version check and a single habits query
+    assert counter.count <= 2  # noqa: PLR2004
+    assert response_upcoming.json()['data'] == []
+    assert counter_upcoming.count == 0
+
+
+@pytest.mark.asyncio
+async def test_get_dashboard_not_modified(client, token, habit):
+    headers = {'Authorization': f'Bearer {token}'}
+    response_first = await client.get('/dashboard', headers=headers)
+    etag = response_first.headers['ETag']
+
+    response_cached = await client.get(
+        '/dashboard', headers={**headers, 'If-None-Match': etag}
+    )
+    await client.patch(
+        f'/habit/{habit.id}', json={'name': 'Renamed'}, headers=headers
+    )
+    response_changed = await client.get(
+        '/dashboard', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response_cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert response_changed.status_code == HTTPStatus.OK
+    assert response_changed.json()['data']['habits'][0]['name'] == 'Renamed'
+
+
+@pytest.mark.asyncio
+async def test_get_dashboard_follows_profile_written_elsewhere(
+    client, session, token, user
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    response_first = await client.get('/dashboard', headers=headers)
+
+    # Another worker's write leaves this process's user_cache in place
+    await session.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(username='Johnny', data_version=User.data_version + 1)
+    )
+    await session.commit()
+
+    response = await client.get(
+        '/dashboard',
+        headers={**headers, 'If-None-Match': response_first.headers['ETag']},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['data']['user']['username'] == 'Johnny'
+
+
+@pytest.mark.asyncio
+async def test_get_dashboard_unauthorized(client):
+    response = await client.get('/dashboard')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -1,11 +1,26 @@
-from datetime import date
+from datetime import date, timedelta
 from http import HTTPStatus
 
 import pytest
 from freezegun import freeze_time
-
-from app.schemas.habit_schema import HabitConclusionReturn, HabitReturn
+from sqlalchemy import func, insert, select, update
+
+from app.models.habit import Habit
+from app.models.habit_conclution import HabitConclusion
+from app.models.user import User
+from app.schemas.habit_schema import (
+    HabitBatchResult,
+    HabitChanges,
+    HabitConclusionReturn,
+    HabitReturn,
+)
 from app.schemas.response import BaseResponse
+from app.services.habit_batch_service import HabitBatchService
+from app.services.streak_service import StreakService
+from app.utils import completed_cache as completed_cache_module
+from app.utils.security import AuthLogin
+from app.utils.today_cache import today_cache
+from app.utils.week_days import week_day_of, week_days_to_mask
 
 
 @pytest.mark.asyncio
@@ -46,6 +61,138 @@ async def test_create_same_habit(client, token):
     assert response_schema.message == 'This habit alreary exists'
 
 
+@pytest.mark.asyncio
+async def test_bulk_create_habits(client, token, count_queries):
+    habits = [
+        {'name': f'Habit {i}', 'description': '', 'frequency': [1, 2]}
+        for i in range(30)
+    ]
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter:
+        response = await client.post(
+            '/habit/bulk-create',
+            json=habits,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    response_schema = BaseResponse[list[HabitReturn]].model_validate(
+        response.json()
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert [h.name for h in response_schema.data] == [
+        h['name'] for h in habits
+    ]
+    assert response_schema.data[0].frequency == ['Domingo', 'Segunda']
+    assert counter.count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_active': False}], indirect=True)
+async def test_bulk_create_habits_deactivated_user(client, session, token):
+    response = await client.post(
+        '/habit/bulk-create',
+        json=[{'name': 'Read', 'description': '', 'frequency': [1]}],
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    habits = await session.scalar(select(func.count()).select_from(Habit))
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert habits == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_habits_existing_name(client, token, habit):
+    response = await client.post(
+        '/habit/bulk-create',
+        json=[
+            {'name': 'New', 'frequency': [1]},
+            {'name': 'Test', 'frequency': [1]},
+        ],
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    response_all = await client.get(
+        '/habit/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response_schema.message == 'This habit alreary exists'
+    assert len(response_all.json()['data']) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_habits_repeated_name(client, token):
+    response = await client.post(
+        '/habit/bulk-create',
+        json=[{'name': 'New', 'frequency': [1]}] * 2,
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_habit_writes_skip_refresh(client, token, count_queries):
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter_create:
+        response_create = await client.post(
+            '/habit/create',
+            json={'name': 'New', 'description': 'New', 'frequency': [1]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    with count_queries() as counter_update:
+        response_update = await client.patch(
+            f'/habit/{response_create.json()["data"]["id"]}',
+            json={'frequency': [1, 2]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response_create.status_code == HTTPStatus.CREATED
+    assert response_update.json()['data']['frequency'] == [
+        'Domingo',
+        'Segunda',
+    ]
+    assert counter_create.count == 1
+    assert counter_update.count == 1
+
+
+@pytest.mark.asyncio
+async def test_habit_writes_do_not_load_other_users_habits(
+    client, session, token, another_user, count_queries
+):
+    session.add_all([
+        Habit(
+            name=f'Other {i}',
+            description='',
+            frequency_mask=week_days_to_mask([1]),
+            user_id=another_user.id,
+        )
+        for i in range(50)
+    ])
+    await session.commit()
+
+    with count_queries() as counter:
+        response_create = await client.post(
+            '/habit/create',
+            json={'name': 'New', 'description': 'New', 'frequency': [1]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        response_update = await client.patch(
+            f'/habit/{response_create.json()["data"]["id"]}',
+            json={'frequency': [1, 2]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response_create.status_code == HTTPStatus.CREATED
+    assert response_update.status_code == HTTPStatus.OK
+    assert counter.rows < 20  # noqa: PLR2004
+
+
 @pytest.mark.asyncio
 async def test_get_all_user_habit(client, token, habit):
     response = await client.get(
@@ -65,6 +212,553 @@ async def test_get_all_user_habit(client, token, habit):
     assert 'Domingo' in response_schema.data[0].frequency
 
 
+@pytest.mark.asyncio
+async def test_get_all_user_habit_paginated(client, token):
+    for name in ('First', 'Second', 'Third'):
+        await client.post(
+            '/habit/create',
+            json={'name': name, 'description': name, 'frequency': [1]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    response = await client.get(
+        '/habit/',
+        params={'limit': 2},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    first_page = BaseResponse[list[HabitReturn]].model_validate(
+        response.json()
+    )
+
+    response = await client.get(
+        '/habit/',
+        params={'limit': 2, 'cursor': first_page.next_cursor},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    second_page = BaseResponse[list[HabitReturn]].model_validate(
+        response.json()
+    )
+
+    assert [habit.name for habit in first_page.data] == ['First', 'Second']
+    assert first_page.next_cursor
+    assert [habit.name for habit in second_page.data] == ['Third']
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_user_habit_unpaginated(client, token):
+    for name in ('First', 'Second', 'Third'):
+        await client.post(
+            '/habit/create',
+            json={'name': name, 'description': name, 'frequency': [1]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    response = await client.get(
+        '/habit/',
+        params={'limit': 1, 'unpaginated': True},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse[list[HabitReturn]].model_validate(
+        response.json()
+    )
+
+    assert len(response_schema.data) == 3  # noqa: PLR2004
+    assert response_schema.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_user_habit_not_modified(
+    client, token, habit, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        response_first = await client.get('/habit/', headers=headers)
+        etag = response_first.headers['ETag']
+
+        with count_queries() as counter:
+            response_cached = await client.get(
+                '/habit/', headers={**headers, 'If-None-Match': etag}
+            )
+
+        await client.post(f'/habit/mark-done/{habit.id}', headers=headers)
+        response_changed = await client.get(
+            '/habit/', headers={**headers, 'If-None-Match': etag}
+        )
+
+    assert response_cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert response_cached.content == b''
+    assert response_cached.headers['ETag'] == etag
+    assert counter.count == 1
+    assert response_changed.status_code == HTTPStatus.OK
+    assert response_changed.headers['ETag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_habit_by_id_not_modified(
+    client, token, habit, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    response_first = await client.get(f'/habit/{habit.id}', headers=headers)
+
+    with count_queries() as counter:
+        response = await client.get(
+            f'/habit/{habit.id}',
+            headers={
+                **headers,
+                'If-None-Match': response_first.headers['ETag'],
+            },
+        )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    # Only the revision is read, never the habit's columns
+    assert counter.count == 1
+    assert 'habits.name' not in counter.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_get_habit_by_id_modified_after_mark(
+    client, session, token, habit
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    habit_id = habit.id
+    with freeze_time('2025-12-07 12:00:00'):
+        response_first = await client.get(
+            f'/habit/{habit_id}', headers=headers
+        )
+        await client.post(f'/habit/mark-done/{habit_id}', headers=headers)
+        # The app shares this session; a request gets a fresh one
+        session.expire_all()
+
+        response = await client.get(
+            f'/habit/{habit_id}',
+            headers={
+                **headers,
+                'If-None-Match': response_first.headers['ETag'],
+            },
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['data']['total_completions'] == 1
+    assert response.headers['ETag'] != response_first.headers['ETag']
+
+
+@pytest.mark.asyncio
+async def test_get_all_user_habit_invalid_cursor(client, token):
+    response = await client.get(
+        '/habit/',
+        params={'cursor': 'not-a-cursor'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response_schema.message == 'Invalid cursor'
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_full_sync(
+    client, token, habit, habit_another_user
+):
+    response = await client.get(
+        '/habit/changes', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response_schema = BaseResponse[HabitChanges].model_validate(
+        response.json()
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [h.id for h in response_schema.data.habits] == [habit.id]
+    assert response_schema.data.conclusions == []
+    assert response_schema.data.deleted == []
+    assert response_schema.next_cursor
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_delta(client, token, habit):
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        response_full = await client.get('/habit/changes', headers=headers)
+        cursor = response_full.json()['next_cursor']
+
+        response_other = await client.post(
+            '/habit/create',
+            json={'name': 'Other', 'description': '', 'frequency': [1]},
+            headers=headers,
+        )
+        await client.post(f'/habit/mark-done/{habit.id}', headers=headers)
+        await client.delete(
+            f'/habit/delete/{response_other.json()["data"]["id"]}',
+            headers=headers,
+        )
+
+        response = await client.get(
+            '/habit/changes', params={'since': cursor}, headers=headers
+        )
+        response_empty = await client.get(
+            '/habit/changes',
+            params={'since': response.json()['next_cursor']},
+            headers=headers,
+        )
+
+    changes = BaseResponse[HabitChanges].model_validate(response.json()).data
+    empty = (
+        BaseResponse[HabitChanges].model_validate(response_empty.json()).data
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    # Marking changes the habit's streak counters, so it syncs too
+    assert [(h.id, h.total_completions) for h in changes.habits] == [
+        (habit.id, 1)
+    ]
+    assert [c.habit_id for c in changes.conclusions] == [habit.id]
+    assert [(d.entity, d.id) for d in changes.deleted] == [
+        ('habit', response_other.json()['data']['id'])
+    ]
+    assert empty.habits == empty.conclusions == empty.deleted == []
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_after_update_and_unmark(client, token, habit):
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        await client.post(f'/habit/mark-done/{habit.id}', headers=headers)
+        response_full = await client.get('/habit/changes', headers=headers)
+        cursor = response_full.json()['next_cursor']
+
+        await client.patch(
+            f'/habit/{habit.id}', json={'name': 'Renamed'}, headers=headers
+        )
+        await client.delete(f'/habit/unmark-done/{habit.id}', headers=headers)
+
+        response = await client.get(
+            '/habit/changes', params={'since': cursor}, headers=headers
+        )
+
+    changes = BaseResponse[HabitChanges].model_validate(response.json()).data
+
+    assert [h.name for h in changes.habits] == ['Renamed']
+    assert changes.conclusions == []
+    assert [d.entity for d in changes.deleted] == ['conclusion']
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_pages_full_sync(client, token, habit):
+    headers = {'Authorization': f'Bearer {token}'}
+    for name in ('Second', 'Third'):
+        await client.post(
+            '/habit/create',
+            json={'name': name, 'description': '', 'frequency': [1]},
+            headers=headers,
+        )
+
+    response_first = await client.get(
+        '/habit/changes', params={'limit': 2}, headers=headers
+    )
+    response_last = await client.get(
+        '/habit/changes',
+        params={'since': response_first.json()['next_cursor'], 'limit': 2},
+        headers=headers,
+    )
+
+    first = (
+        BaseResponse[HabitChanges].model_validate(response_first.json()).data
+    )
+    last = BaseResponse[HabitChanges].model_validate(response_last.json()).data
+
+    assert [h.name for h in first.habits] == [habit.name, 'Second']
+    assert first.has_more
+    assert [h.name for h in last.habits] == ['Third']
+    assert not last.has_more
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_wait_for_open_transactions(
+    client, engine, token, user
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    async with engine.connect() as conn:
+        # Writes first, but commits after the habit created below
+        await conn.execute(
+            insert(Habit).values(name='Slow', description='', user_id=user.id)
+        )
+        await client.post(
+            '/habit/create',
+            json={'name': 'Fast', 'description': '', 'frequency': [1]},
+            headers=headers,
+        )
+
+        response_open = await client.get('/habit/changes', headers=headers)
+        await conn.commit()
+
+    response = await client.get(
+        '/habit/changes',
+        params={'since': response_open.json()['next_cursor']},
+        headers=headers,
+    )
+
+    held_back = (
+        BaseResponse[HabitChanges].model_validate(response_open.json()).data
+    )
+    changes = BaseResponse[HabitChanges].model_validate(response.json()).data
+
+    assert held_back.habits == []
+    assert [h.name for h in changes.habits] == ['Slow', 'Fast']
+
+
+@pytest.mark.asyncio
+async def test_habit_changes_invalid_cursor(client, token):
+    response = await client.get(
+        '/habit/changes',
+        params={'since': 'not-a-cursor'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_habit_batch_replays_backlog(
+    client, session, token, user, count_queries
+):
+    daily = Habit(
+        name='Daily',
+        description='',
+        frequency_mask=week_days_to_mask(range(1, 8)),
+        user_id=user.id,
+    )
+    session.add(daily)
+    await session.commit()
+
+    operations = [
+        {
+            'op': 'mark',
+            'habit_id': daily.id,
+            'conclusion_date': str(date.today() - timedelta(days=day)),
+        }
+        for day in range(500)
+    ]
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter:
+        response = await client.post(
+            '/habit/batch',
+            json={'operations': operations},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    results = (
+        BaseResponse[list[HabitBatchResult]]
+        .model_validate(response.json())
+        .data
+    )
+    concluded = await session.scalar(
+        select(func.count()).select_from(HabitConclusion)
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert {result.status for result in results} == {'success'}
+    assert concluded == 500  # noqa: PLR2004
+    assert counter.count <= 4  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_habit_batch_per_item_results(client, token, habit):
+    sunday = date.today() - timedelta(days=(date.today().weekday() + 1) % 7)
+    operations = [
+        {'op': 'create', 'habit': {'name': 'Read', 'frequency': [1]}},
+        {'op': 'create', 'habit': {'name': 'Test'}},
+        {'op': 'update', 'habit_id': habit.id, 'habit': {'name': 'Run'}},
+        {'op': 'mark', 'habit_id': habit.id, 'conclusion_date': str(sunday)},
+        {'op': 'mark', 'habit_id': habit.id, 'conclusion_date': str(sunday)},
+        {
+            'op': 'unmark',
+            'habit_id': habit.id,
+            'conclusion_date': str(sunday - timedelta(days=7)),
+        },
+        {
+            'op': 'mark',
+            'habit_id': habit.id,
+            'conclusion_date': str(sunday + timedelta(days=7)),
+        },
+        {
+            'op': 'mark',
+            'habit_id': habit.id + 100,
+            'conclusion_date': '2025-01-05',
+        },
+    ]
+
+    response = await client.post(
+        '/habit/batch',
+        json={'operations': operations},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    response_habit = await client.get(
+        f'/habit/{habit.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    results = (
+        BaseResponse[list[HabitBatchResult]]
+        .model_validate(response.json())
+        .data
+    )
+
+    assert [(r.status, r.message) for r in results] == [
+        ('success', None),
+        ('error', 'This habit alreary exists'),
+        ('success', None),
+        ('success', None),
+        ('error', 'This habit has already been established this day.'),
+        ('error', 'This habit was not conclusion yet'),
+        ('error', 'Conclusion date cannot be in the future'),
+        ('error', 'Habit not found'),
+    ]
+    assert results[0].habit_id is not None
+    assert response_habit.json()['data']['name'] == 'Run'
+    assert response_habit.json()['data']['version'] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_active': False}], indirect=True)
+async def test_habit_batch_deactivated_user(client, session, token):
+    response = await client.post(
+        '/habit/batch',
+        json={'operations': [{'op': 'create', 'habit': {'name': 'Read'}}]},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    habits = await session.scalar(select(func.count()).select_from(Habit))
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert habits == 0
+
+
+@pytest.mark.asyncio
+async def test_habit_batch_rename_into_freed_name(client, token, habit):
+    headers = {'Authorization': f'Bearer {token}'}
+    response_other = await client.post(
+        '/habit/create',
+        json={'name': 'Other', 'description': '', 'frequency': [1]},
+        headers=headers,
+    )
+    other_id = response_other.json()['data']['id']
+
+    # The older habit takes the name the newer one gives up
+    response = await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {
+                    'op': 'update',
+                    'habit_id': other_id,
+                    'habit': {'name': 'Renamed'},
+                },
+                {
+                    'op': 'update',
+                    'habit_id': habit.id,
+                    'habit': {'name': 'Other'},
+                },
+            ]
+        },
+        headers=headers,
+    )
+    response_habits = await client.get(
+        '/habit/', params={'unpaginated': True}, headers=headers
+    )
+
+    results = (
+        BaseResponse[list[HabitBatchResult]]
+        .model_validate(response.json())
+        .data
+    )
+
+    assert [r.status for r in results] == ['success', 'success']
+    assert sorted(h['name'] for h in response_habits.json()['data']) == [
+        'Other',
+        'Renamed',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_habit_batch_rename_taken_after_plan(
+    client, engine, token, habit, monkeypatch
+):
+    plan = HabitBatchService._plan
+
+    async def plan_then_take_name(batch, user, db):
+        planned = await plan(batch, user, db)
+        # Another request claims the name before the batch writes it
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(Habit).values(
+                    name='Run', description='', user_id=user.id
+                )
+            )
+        return planned
+
+    monkeypatch.setattr(
+        HabitBatchService, '_plan', staticmethod(plan_then_take_name)
+    )
+    response = await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {
+                    'op': 'update',
+                    'habit_id': habit.id,
+                    'habit': {'name': 'Run'},
+                },
+                {'op': 'create', 'habit': {'name': 'Read'}},
+            ]
+        },
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    results = (
+        BaseResponse[list[HabitBatchResult]]
+        .model_validate(response.json())
+        .data
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [(r.status, r.message) for r in results] == [
+        ('error', 'This habit alreary exists'),
+        ('success', None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_habit_batch_mark_then_unmark_cancels_out(
+    client, session, token, habit, count_queries
+):
+    sunday = date.today() - timedelta(days=(date.today().weekday() + 1) % 7)
+    operations = [
+        {'op': op, 'habit_id': habit.id, 'conclusion_date': str(sunday)}
+        for op in ('mark', 'unmark')
+    ]
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter:
+        response = await client.post(
+            '/habit/batch',
+            json={'operations': operations},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    concluded = await session.scalar(
+        select(func.count()).select_from(HabitConclusion)
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert concluded == 0
+    # Only the two lookups run, nothing is written
+    assert counter.count == 2  # noqa: PLR2004
+
+
 @pytest.mark.asyncio
 async def test_delete_habit_by_id(client, token, habit):
     response = await client.delete(
@@ -75,6 +769,39 @@ async def test_delete_habit_by_id(client, token, habit):
     assert response.status_code == HTTPStatus.NO_CONTENT
 
 
+@pytest.mark.asyncio
+async def test_delete_habit_with_conclusion_history(
+    client, session, token, habit, count_queries
+):
+    days = func.generate_series(1, 3000).column_valued()
+    await session.execute(
+        insert(HabitConclusion).from_select(
+            ['habit_id', 'conclusion_date', 'created_at'],
+            select(
+                habit.id,
+                func.current_date() - days,
+                func.now(),
+            ),
+        )
+    )
+    await session.commit()
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter:
+        response = await client.delete(
+            f'/habit/delete/{habit.id}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    remaining = await session.scalar(
+        select(func.count()).select_from(HabitConclusion)
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert counter.count == 1
+    assert remaining == 0
+
+
 @pytest.mark.asyncio
 async def test_delete_not_existent_habit_by_id(client, token):
     response = await client.delete(
@@ -89,6 +816,68 @@ async def test_delete_not_existent_habit_by_id(client, token):
     assert response_schema.message == 'Habit not found'
 
 
+@pytest.mark.asyncio
+async def test_delete_habit_ignores_stale_admin_claim(
+    client, user, habit_another_user
+):
+    # Issued while the user was an admin; the database has since demoted them
+    token = AuthLogin.generate_token(user.id, is_admin=True)
+
+    response = await client.delete(
+        f'/habit/delete/{habit_another_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_habit_reads_ignore_stale_admin_claim(
+    client, user, habit_another_user
+):
+    token = AuthLogin.generate_token(user.id, is_admin=True)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response_habit = await client.get(
+        f'/habit/{habit_another_user.id}', headers=headers
+    )
+    response_history = await client.get(
+        f'/habit/{habit_another_user.id}/history', headers=headers
+    )
+
+    assert response_habit.status_code == HTTPStatus.UNAUTHORIZED
+    assert response_history.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_active': False}], indirect=True)
+async def test_versioned_reads_reject_deactivated_user(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response_habits = await client.get('/habit/', headers=headers)
+    response_completed = await client.get(
+        '/habit/completed', params={'date': '2025-01-05'}, headers=headers
+    )
+
+    assert response_habits.status_code == HTTPStatus.UNAUTHORIZED
+    assert response_completed.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_update_habit_ignores_stale_admin_claim(
+    client, user, habit_another_user
+):
+    token = AuthLogin.generate_token(user.id, is_admin=True)
+
+    response = await client.patch(
+        f'/habit/{habit_another_user.id}',
+        json={'name': 'Taken over'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 @pytest.mark.asyncio
 async def test_delete_habit_by_id_another_user(
     client, token, habit_another_user
@@ -129,6 +918,25 @@ async def test_mark_done_habit(client, token, habit):
         assert response_schema.data.habit.description == 'Test'
 
 
+@pytest.mark.asyncio
+async def test_mark_done_habit_single_statement(
+    client, token, habit, count_queries
+):
+    with freeze_time('2025-12-07 12:00:00'):
+        await client.get(
+            '/user/', headers={'Authorization': f'Bearer {token}'}
+        )
+
+        with count_queries() as counter:
+            response = await client.post(
+                f'/habit/mark-done/{habit.id}',
+                headers={'Authorization': f'Bearer {token}'},
+            )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert counter.count == 1
+
+
 @pytest.mark.asyncio
 async def test_mark_done_not_existent_habit(client, token):
     response = await client.post(
@@ -297,6 +1105,159 @@ async def test_get_completed_by_day(client, token, habit):
     assert len(response_schema.data) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_completed_past_day_cached(
+    client, session, token, habit, count_queries
+):
+    past_day = date.today() - timedelta(days=3)
+    conclusion = HabitConclusion(habit_id=habit.id)
+    conclusion.conclusion_date = past_day
+    session.add(conclusion)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {'date': str(past_day)}
+    response_first = await client.get(
+        '/habit/completed', params=params, headers=headers
+    )
+
+    with count_queries() as counter:
+        response_cached = await client.get(
+            '/habit/completed', params=params, headers=headers
+        )
+
+    await client.patch(
+        f'/habit/{habit.id}', json={'name': 'Renamed'}, headers=headers
+    )
+    response_updated = await client.get(
+        '/habit/completed', params=params, headers=headers
+    )
+
+    assert response_first.headers['Cache-Control'] == 'private, no-cache'
+    assert response_cached.json()['data'] == response_first.json()['data']
+    # Only the data_version lookup behind the ETag
+    assert counter.count == 1
+    assert response_updated.json()['data'][0]['name'] == 'Renamed'
+
+
+@pytest.mark.asyncio
+async def test_get_completed_past_day_follows_other_workers(
+    client, session, token, habit
+):
+    past_day = date.today() - timedelta(days=3)
+    conclusion = HabitConclusion(habit_id=habit.id)
+    conclusion.conclusion_date = past_day
+    session.add(conclusion)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {'date': str(past_day)}
+    response_first = await client.get(
+        '/habit/completed', params=params, headers=headers
+    )
+
+    # A write served by another process leaves this one's cache in place
+    await session.execute(
+        update(Habit).where(Habit.id == habit.id).values(name='Elsewhere')
+    )
+    await session.execute(
+        update(User)
+        .where(User.id == habit.user_id)
+        .values(data_version=User.data_version + 1)
+    )
+    await session.commit()
+    session.expire_all()
+
+    response = await client.get(
+        '/habit/completed',
+        params=params,
+        headers={**headers, 'If-None-Match': response_first.headers['ETag']},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['data'][0]['name'] == 'Elsewhere'
+
+
+@pytest.mark.asyncio
+async def test_get_completed_past_day_revalidates_after_batch(
+    client, session, token, user
+):
+    daily = Habit(
+        name='Daily',
+        description='',
+        frequency_mask=week_days_to_mask(range(1, 8)),
+        user_id=user.id,
+    )
+    session.add(daily)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    past_day = str(date.today() - timedelta(days=3))
+    operation = {'habit_id': daily.id, 'conclusion_date': past_day}
+    await client.post(
+        '/habit/batch',
+        json={'operations': [{**operation, 'op': 'mark'}]},
+        headers=headers,
+    )
+    response_first = await client.get(
+        '/habit/completed', params={'date': past_day}, headers=headers
+    )
+    etag = response_first.headers['ETag']
+
+    response_cached = await client.get(
+        '/habit/completed',
+        params={'date': past_day},
+        headers={**headers, 'If-None-Match': etag},
+    )
+    await client.post(
+        '/habit/batch',
+        json={'operations': [{**operation, 'op': 'unmark'}]},
+        headers=headers,
+    )
+    response_changed = await client.get(
+        '/habit/completed',
+        params={'date': past_day},
+        headers={**headers, 'If-None-Match': etag},
+    )
+
+    assert len(response_first.json()['data']) == 1
+    assert response_cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert response_changed.status_code == HTTPStatus.OK
+    assert response_changed.json()['data'] == []
+
+
+def test_completed_cache_evicts_least_recently_read(monkeypatch):
+    monkeypatch.setattr(
+        completed_cache_module, 'COMPLETED_CACHE_DATES_PER_USER', 2
+    )
+    first, second, third = (date(2025, 1, day) for day in (1, 2, 3))
+
+    completed_cache_module.remember_completed(1, 1, first, [])
+    completed_cache_module.remember_completed(1, 1, second, [])
+    completed_cache_module.recall_completed(1, 1, first)
+    completed_cache_module.remember_completed(1, 1, third, [])
+
+    assert completed_cache_module.recall_completed(1, 1, first) == []
+    assert completed_cache_module.recall_completed(1, 1, second) is None
+
+
+@pytest.mark.asyncio
+async def test_get_completed_today_not_cached(
+    client, token, habit, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {'date': str(date.today())}
+    response = await client.get(
+        '/habit/completed', params=params, headers=headers
+    )
+
+    with count_queries() as counter:
+        await client.get('/habit/completed', params=params, headers=headers)
+
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert counter.count == 2  # noqa: PLR2004
+
+
 @pytest.mark.asyncio
 async def test_get_upcoming_habits(client, token, habit):
     with freeze_time('2025-12-07 12:00:00'):
@@ -315,6 +1276,88 @@ async def test_get_upcoming_habits(client, token, habit):
         assert len(response_schema.data) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_upcoming_habits_served_from_cache(
+    client, token, habit, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        await client.get('/habit/upcoming', headers=headers)
+        await client.post(f'/habit/mark-done/{habit.id}', headers=headers)
+        response_create = await client.post(
+            '/habit/create',
+            json={'name': 'New', 'description': '', 'frequency': [1]},
+            headers=headers,
+        )
+
+        with count_queries() as counter:
+            response = await client.get('/habit/upcoming', headers=headers)
+
+    response_schema = BaseResponse[list[HabitReturn]].model_validate(
+        response.json()
+    )
+
+    assert [h.id for h in response_schema.data] == [
+        response_create.json()['data']['id']
+    ]
+    assert counter.count == 0
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_habits_not_modified(
+    client, token, habit, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        response_first = await client.get('/habit/upcoming', headers=headers)
+
+        with count_queries() as counter:
+            response = await client.get(
+                '/habit/upcoming',
+                headers={
+                    **headers,
+                    'If-None-Match': response_first.headers['ETag'],
+                },
+            )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert counter.count == 0
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_habits_cache_rolls_over(
+    client, token, habit, count_queries, monkeypatch
+):
+    monkeypatch.setattr(today_cache, 'ttl', 10**7)
+    headers = {'Authorization': f'Bearer {token}'}
+    with freeze_time('2025-12-07 12:00:00'):
+        response_sunday = await client.get('/habit/upcoming', headers=headers)
+
+    with freeze_time('2025-12-08 12:00:00'):
+        with count_queries() as counter:
+            response_monday = await client.get(
+                '/habit/upcoming', headers=headers
+            )
+
+    assert len(response_sunday.json()['data']) == 1
+    assert response_monday.json()['data'] == []
+    assert counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_habits_does_not_load_user(
+    client, token, habit, count_queries
+):
+    with count_queries() as counter:
+        response = await client.get(
+            '/habit/upcoming',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('FROM users' in stmt for stmt in counter.statements)
+
+
 @pytest.mark.asyncio
 async def test_get_habit_by_id(client, token, habit):
     response = await client.get(
@@ -330,6 +1373,33 @@ async def test_get_habit_by_id(client, token, habit):
     assert response_schema.data.name == 'Test'
 
 
+@pytest.mark.asyncio
+async def test_habit_lookup_scoped_to_owner(
+    client, token, habit, habit_another_user, count_queries
+):
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter_own:
+        response_own = await client.get(
+            f'/habit/{habit.id}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    with count_queries() as counter_foreign:
+        response_foreign = await client.patch(
+            f'/habit/{habit_another_user.id}',
+            json={'name': 'Stolen'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response_own.status_code == HTTPStatus.OK
+    assert response_foreign.status_code == HTTPStatus.UNAUTHORIZED
+    assert counter_own.count == 1
+    assert 'habits.user_id' in counter_own.statements[0]
+    # Only the id probe on the error path returns a row
+    assert counter_foreign.rows == 1
+
+
 @pytest.mark.asyncio
 async def test_get_not_found_habit_by_id(client, token):
     response = await client.get(
@@ -361,6 +1431,22 @@ async def test_get_another_user_habit_by_id(client, token, habit_another_user):
     )
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_admin_get_another_user_habit_by_id(
+    client, user, token, habit_another_user
+):
+    response = await client.get(
+        f'/habit/{habit_another_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse[HabitReturn].model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.OK
+    assert response_schema.data.id == habit_another_user.id
+
+
 @pytest.mark.asyncio
 async def test_update_habit_by_id(client, token, habit):
     response = await client.patch(
@@ -383,6 +1469,82 @@ async def test_update_habit_by_id(client, token, habit):
     assert response_schema.data.frequency == ['Domingo', 'Segunda']
 
 
+@pytest.mark.asyncio
+async def test_update_habit_bumps_version(client, token, habit):
+    response_get = await client.get(
+        f'/habit/{habit.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = await client.patch(
+        f'/habit/{habit.id}',
+        json={'name': 'New Test'},
+        headers={
+            'Authorization': f'Bearer {token}',
+            'If-Match': response_get.headers['ETag'],
+        },
+    )
+
+    response_schema = BaseResponse[HabitReturn].model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.OK
+    assert response_get.headers['ETag'].startswith('"1.')
+    assert response_schema.data.version == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_update_habit_stale_version(client, token, habit):
+    await client.patch(
+        f'/habit/{habit.id}',
+        json={'name': 'First', 'version': 1},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = await client.patch(
+        f'/habit/{habit.id}',
+        json={'name': 'Second', 'version': 1},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response_schema.message == (
+        'This habit was modified by another request'
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_habit_invalid_if_match(client, token, habit):
+    response = await client.patch(
+        f'/habit/{habit.id}',
+        json={'name': 'New Test'},
+        headers={'Authorization': f'Bearer {token}', 'If-Match': 'abc'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_update_habit_to_existing_name(client, token, habit):
+    response_create = await client.post(
+        '/habit/create',
+        json={'name': 'Other', 'description': 'Other', 'frequency': [1]},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = await client.patch(
+        f'/habit/{response_create.json()["data"]["id"]}',
+        json={'name': 'Test'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response_schema.message == 'This habit alreary exists'
+
+
 @pytest.mark.asyncio
 async def test_update_not_found_habit_by_id(client, token):
     response = await client.patch(
@@ -424,3 +1586,275 @@ async def test_update_another_user_habit_by_id(
         response_schema.message
         == 'You do not have permission to perform this action.'
     )
+
+
+@pytest.mark.asyncio
+async def test_habit_streaks_follow_mark_and_unmark(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    response_create = await client.post(
+        '/habit/create',
+        json={'name': 'Daily', 'frequency': list(range(1, 8))},
+        headers=headers,
+    )
+    habit_id = response_create.json()['data']['id']
+    await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {
+                    'op': 'mark',
+                    'habit_id': habit_id,
+                    'conclusion_date': str(date.today() - timedelta(days=day)),
+                }
+                for day in (1, 2)
+            ]
+        },
+        headers=headers,
+    )
+
+    response_mark = await client.post(
+        f'/habit/mark-done/{habit_id}', headers=headers
+    )
+    await client.delete(f'/habit/unmark-done/{habit_id}', headers=headers)
+    response_get = await client.get(f'/habit/{habit_id}', headers=headers)
+
+    marked = (
+        BaseResponse[HabitConclusionReturn]
+        .model_validate(response_mark.json())
+        .data.habit
+    )
+    unmarked = BaseResponse[HabitReturn].model_validate(response_get.json())
+
+    assert (
+        marked.current_streak,
+        marked.longest_streak,
+        marked.total_completions,
+        marked.last_completed_at,
+    ) == (3, 3, 3, date.today())
+    assert (
+        unmarked.data.current_streak,
+        unmarked.data.longest_streak,
+        unmarked.data.total_completions,
+        unmarked.data.last_completed_at,
+    ) == (2, 2, 2, date.today() - timedelta(days=1))
+
+
+@pytest.mark.asyncio
+async def test_habit_streak_skips_unscheduled_days(
+    client, session, token, user
+):
+    today = date.today()
+    days = [today - timedelta(days=offset) for offset in range(3)]
+    every_other = Habit(
+        name='Every other day',
+        description='',
+        frequency_mask=week_days_to_mask([
+            week_day_of(days[0]),
+            week_day_of(days[2]),
+        ]),
+        user_id=user.id,
+    )
+    missed = Habit(
+        name='Missed yesterday',
+        description='',
+        frequency_mask=week_days_to_mask(week_day_of(day) for day in days),
+        user_id=user.id,
+    )
+    session.add_all([every_other, missed])
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {
+                    'op': 'mark',
+                    'habit_id': habit.id,
+                    'conclusion_date': str(days[2]),
+                }
+                for habit in (every_other, missed)
+            ]
+        },
+        headers=headers,
+    )
+    response_every_other = await client.post(
+        f'/habit/mark-done/{every_other.id}', headers=headers
+    )
+    response_missed = await client.post(
+        f'/habit/mark-done/{missed.id}', headers=headers
+    )
+
+    assert response_every_other.json()['data']['habit']['current_streak'] == 2  # noqa: PLR2004
+    assert response_missed.json()['data']['habit']['current_streak'] == 1
+    assert response_missed.json()['data']['habit']['longest_streak'] == 1
+
+
+async def _data_versions(session):
+    rows = await session.execute(select(User.id, User.data_version))
+    return dict(rows.tuples().all())
+
+
+@pytest.mark.asyncio
+async def test_rebuild_streaks_repairs_counters(
+    client, session, token, habit, habit_another_user
+):
+    # Conclusions written behind the services' back leave stale counters
+    habit.frequency_mask = week_days_to_mask(range(1, 8))
+    await session.execute(
+        insert(HabitConclusion),
+        [
+            {
+                'habit_id': habit.id,
+                'conclusion_date': date.today() - timedelta(days=day),
+            }
+            for day in (2, 3, 4, 6)
+        ],
+    )
+    await session.commit()
+
+    habit_id, owner_id = habit.id, habit.user_id
+    versions_before = await _data_versions(session)
+    rebuilt = await StreakService.rebuild_all(session, batch_size=1)
+    versions_after = await _data_versions(session)
+    session.expire_all()
+    response = await client.get(
+        f'/habit/{habit_id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    data = BaseResponse[HabitReturn].model_validate(response.json()).data
+
+    # Both habits are scanned, but only the drifted one is rewritten
+    assert rebuilt == 1
+    # Only the owner of the drifted habit sees its data_version move
+    assert versions_after == {
+        **versions_before,
+        owner_id: versions_before[owner_id] + 1,
+    }
+    # Yesterday was skipped, so the stored run of 3 no longer counts
+    assert data.current_streak == 0
+    assert data.longest_streak == 3  # noqa: PLR2004
+    assert data.total_completions == 4  # noqa: PLR2004
+    assert data.last_completed_at == date.today() - timedelta(days=2)
+
+
+@pytest.mark.asyncio
+async def test_habit_history_follows_marks(client, session, token, user):
+    daily = Habit(
+        name='Daily',
+        description='',
+        frequency_mask=week_days_to_mask(range(1, 8)),
+        user_id=user.id,
+    )
+    session.add(daily)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    today = date.today()
+    await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {
+                    'op': op,
+                    'habit_id': daily.id,
+                    'conclusion_date': str(today - timedelta(days=day)),
+                }
+                for op, day in (('mark', 1), ('mark', 3), ('unmark', 3))
+            ]
+        },
+        headers=headers,
+    )
+    await client.post(f'/habit/mark-done/{daily.id}', headers=headers)
+    response_marked = await client.get(
+        f'/habit/{daily.id}/history',
+        params={'from': str(today - timedelta(days=5)), 'format': 'dates'},
+        headers=headers,
+    )
+    await client.delete(f'/habit/unmark-done/{daily.id}', headers=headers)
+    response_unmarked = await client.get(
+        f'/habit/{daily.id}/history',
+        params={'from': str(today - timedelta(days=5)), 'format': 'dates'},
+        headers=headers,
+    )
+
+    assert response_marked.status_code == HTTPStatus.OK
+    assert response_marked.json()['data']['dates'] == [
+        str(today - timedelta(days=1)),
+        str(today),
+    ]
+    assert response_unmarked.json()['data']['dates'] == [
+        str(today - timedelta(days=1))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_habit_history_bitmap_across_years(
+    client, session, token, user, count_queries
+):
+    daily = Habit(
+        name='Daily',
+        description='',
+        frequency_mask=week_days_to_mask(range(1, 8)),
+        user_id=user.id,
+    )
+    session.add(daily)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    await client.post(
+        '/habit/batch',
+        json={
+            'operations': [
+                {'op': 'mark', 'habit_id': daily.id, 'conclusion_date': day}
+                for day in ('2024-12-31', '2025-01-01')
+            ]
+        },
+        headers=headers,
+    )
+    await client.get('/user/', headers=headers)
+
+    with count_queries() as counter:
+        response = await client.get(
+            f'/habit/{daily.id}/history',
+            params={'from': '2024-12-30', 'to': '2025-01-02'},
+            headers=headers,
+        )
+
+    data = response.json()['data']
+
+    assert response.status_code == HTTPStatus.OK
+    # Bits 0110, padded to one byte
+    assert data['bitmap'] == 'YA=='
+    assert data['dates'] is None
+    assert counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_habit_history_errors(
+    client, session, token, habit, another_user
+):
+    another_habit = Habit(
+        name='Other',
+        description='',
+        frequency_mask=week_days_to_mask([1]),
+        user_id=another_user.id,
+    )
+    session.add(another_habit)
+    await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    response_range = await client.get(
+        f'/habit/{habit.id}/history',
+        params={'from': '2025-02-01', 'to': '2025-01-01'},
+        headers=headers,
+    )
+    response_foreign = await client.get(
+        f'/habit/{another_habit.id}/history', headers=headers
+    )
+    response_missing = await client.get('/habit/999/history', headers=headers)
+
+    assert response_range.status_code == HTTPStatus.BAD_REQUEST
+    assert response_range.json()['message'] == 'Invalid date range'
+    assert response_foreign.status_code == HTTPStatus.UNAUTHORIZED
+    assert response_missing.status_code == HTTPStatus.NOT_FOUND
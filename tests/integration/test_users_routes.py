@@ -2,8 +2,10 @@ from http import HTTPStatus
 
 import pytest
 
+from app.schemas.metrics_schema import MetricsOut
 from app.schemas.response import BaseResponse
 from app.schemas.user_schema import UserOut, UserOutFull
+from app.utils.security import user_cache
 
 
 @pytest.mark.asyncio
@@ -147,9 +149,83 @@ async def test_deactivate_user_already_deactivated(client, user, token):
 
     response_schema = BaseResponse.model_validate(response.json())
 
-    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response_schema.status == 'error'
-    assert response_schema.message == 'User alreary deactivate'
+    assert response_schema.message == 'User is deactivated'
+
+
+@pytest.mark.asyncio
+async def test_deactivate_user_invalidates_cached_user(client, user, token):
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    await client.put(
+        '/user/deactivate',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = await client.get(
+        '/user/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response_schema = BaseResponse.model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response_schema.message == 'User is deactivated'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_active': False}], indirect=True)
+async def test_deactivated_user_locked_out_from_cache(client, user, token):
+    response_db = await client.get(
+        '/user/', headers={'Authorization': f'Bearer {token}'}
+    )
+    hits = user_cache.hits
+    response_cached = await client.get(
+        '/user/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response_db.status_code == HTTPStatus.UNAUTHORIZED
+    assert response_cached.status_code == HTTPStatus.UNAUTHORIZED
+    assert user_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_user_writes_single_statement(
+    client, user, token, count_queries
+):
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter_create:
+        response_create = await client.post(
+            '/user/create',
+            json={
+                'username': 'Jane',
+                'email': 'jane@doe.com',
+                'password': 'secret',
+            },
+        )
+
+    with count_queries() as counter_update:
+        response_update = await client.patch(
+            '/user/update',
+            json={'username': 'Johnny'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    with count_queries() as counter_deactivate:
+        response_deactivate = await client.put(
+            '/user/deactivate',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response_create.status_code == HTTPStatus.CREATED
+    assert response_update.json()['data']['username'] == 'Johnny'
+    assert response_deactivate.status_code == HTTPStatus.OK
+    assert counter_create.count == 1
+    assert counter_update.count == 1
+    assert counter_deactivate.count == 1
 
 
 @pytest.mark.asyncio
@@ -224,6 +300,97 @@ async def test_get_all_users(client, user, token):
     assert response_schema.data[0].is_active
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_get_all_users_paginated(client, user, another_user, token):
+    response = await client.get(
+        '/user/all-users',
+        params={'limit': 1},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    first_page = BaseResponse[list[UserOutFull]].model_validate(
+        response.json()
+    )
+
+    response = await client.get(
+        '/user/all-users',
+        params={'limit': 1, 'cursor': first_page.next_cursor},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    second_page = BaseResponse[list[UserOutFull]].model_validate(
+        response.json()
+    )
+
+    assert [u.email for u in first_page.data] == ['john@doe.com']
+    assert [u.email for u in second_page.data] == ['ane@doe.com']
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_get_all_users_filtered(client, user, another_user, token):
+    response = await client.get(
+        '/user/all-users',
+        params={'is_admin': False, 'q': 'AN'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse[list[UserOutFull]].model_validate(
+        response.json()
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [u.username for u in response_schema.data] == ['Ane']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_get_all_users_search_escapes_wildcards(
+    client, user, another_user, token
+):
+    response = await client.get(
+        '/user/all-users',
+        params={'q': '%'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse[list[UserOutFull]].model_validate(
+        response.json()
+    )
+
+    assert response_schema.data == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_export_all_users(client, user, another_user, token):
+    response = await client.get(
+        '/user/all-users/export',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    users = [
+        UserOutFull.model_validate_json(line)
+        for line in response.text.splitlines()
+    ]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [u.email for u in users] == ['john@doe.com', 'ane@doe.com']
+
+
+@pytest.mark.asyncio
+async def test_export_all_users_non_admin(client, user, token):
+    response = await client.get(
+        '/user/all-users/export',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 @pytest.mark.asyncio
 async def test_get_all_users_non_admin(client, user, token):
     response = await client.get(
@@ -239,3 +406,34 @@ async def test_get_all_users_non_admin(client, user, token):
         response_schema.message
         == 'You do not have permission to perform this action.'
     )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [{'is_admin': True}], indirect=True)
+async def test_get_metrics(client, user, token):
+    await client.get('/user/', headers={'Authorization': f'Bearer {token}'})
+
+    response = await client.get(
+        '/user/metrics',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response_schema = BaseResponse[MetricsOut].model_validate(response.json())
+
+    assert response.status_code == HTTPStatus.OK
+    assert response_schema.status == 'success'
+    assert response_schema.message == 'Metrics returned successfully'
+    assert response_schema.data.password_hashing.completed >= 1
+    assert response_schema.data.password_hashing.in_flight == 0
+    assert response_schema.data.user_cache.misses == 1
+    assert response_schema.data.user_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_non_admin(client, user, token):
+    response = await client.get(
+        '/user/metrics',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -1,9 +1,14 @@
 from dataclasses import asdict
+from datetime import date, datetime, timezone
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import IntegrityError
 
-from app.models import User
+from app.models import Day, HabitConclusion, User
+from app.services.habit_service import HabitService
+from app.utils.security import Principal
+from app.utils.week_days import check_week_days
 
 
 @pytest.mark.asyncio
@@ -27,6 +32,114 @@ async def test_create_user(session, mock_db_time):
             'password': 'pass',
             'is_active': True,
             'is_admin': False,
+            'data_version': 1,
             'updated_at': time,
             'created_at': time,
         }
+
+
+@pytest.mark.asyncio
+async def test_check_week_days(session):
+    await check_week_days(session)
+
+
+@pytest.mark.asyncio
+async def test_check_week_days_mismatch(session):
+    await session.execute(update(Day).where(Day.id == 1).values(name='Sunday'))
+
+    with pytest.raises(RuntimeError):
+        await check_week_days(session)
+
+
+@pytest.mark.asyncio
+async def test_habit_conclusion_unique_per_day(session, habit):
+    session.add(HabitConclusion(habit_id=habit.id))
+    await session.commit()
+
+    session.add(HabitConclusion(habit_id=habit.id))
+
+    with pytest.raises(IntegrityError):
+        await session.commit()
+
+
+async def _seed_conclusion_history(session, users=50, habits_per_user=20):
+    await session.execute(
+        text(
+            """
+            INSERT INTO users (username, email, password, is_active,
+                               is_admin, updated_at, created_at)
+            SELECT 'user' || n, 'user' || n || '@doe.com', '', true, false,
+                   now(), now()
+            FROM generate_series(1, :users) AS n
+            """
+        ),
+        {'users': users},
+    )
+    await session.execute(
+        text(
+            """
+            INSERT INTO habits (name, description, user_id, frequency_mask,
+                                is_active, updated_at, created_at)
+            SELECT 'Habit ' || n, '', users.id, 127, true, now(), now()
+            FROM users, generate_series(1, :habits) AS n
+            """
+        ),
+        {'habits': habits_per_user},
+    )
+    await session.execute(
+        text(
+            """
+            INSERT INTO habits_conclusion (habit_id, conclusion_date,
+                                           created_at)
+            SELECT habits.id, DATE '2025-01-01' + d, now()
+            FROM habits, generate_series(0, 364) AS d
+            """
+        )
+    )
+    await session.commit()
+    await session.execute(text('ANALYZE'))
+
+
+async def _explain(session, counter) -> str:
+    connection = await session.connection()
+    plan = await connection.exec_driver_sql(
+        f'EXPLAIN {counter.statements[0]}', counter.parameters[0]
+    )
+    return '\n'.join(row[0] for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_completed_by_day_uses_conclusion_date_index(
+    session, count_queries
+):
+    await _seed_conclusion_history(session)
+    principal = Principal(
+        id=1, is_admin=False, expires_at=datetime.now(timezone.utc)
+    )
+
+    with count_queries() as counter:
+        habits = await HabitService.get_habits_completed_by_day(
+            date(2025, 6, 1), principal, session
+        )
+
+    plan = await _explain(session, counter)
+
+    assert len(habits) == 20  # noqa: PLR2004
+    assert 'uq_habits_conclusion_habit_id_conclusion_date' in plan
+    assert 'Seq Scan on habits_conclusion' not in plan
+
+
+@pytest.mark.asyncio
+async def test_habits_by_user_uses_user_index(session, count_queries):
+    await _seed_conclusion_history(session)
+    principal = Principal(
+        id=1, is_admin=False, expires_at=datetime.now(timezone.utc)
+    )
+
+    with count_queries() as counter:
+        await HabitService.get_habits_by_user_id(principal, session)
+
+    plan = await _explain(session, counter)
+
+    assert 'ix_habits_user_id_' in plan
+    assert 'Seq Scan on habits' not in plan